@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from license_cube import write_dashboard_aggregates
+from process_all_licenses import (
+    link_master_license_lists,
+    read_state_export,
+    schema_column_fields,
+    standardize_dataset,
+    state_exports,
+    state_schemas,
+    write_master_license_list,
+)
+
+first_names = [
+    "JAMES",
+    "JOHN",
+    "ROBERT",
+    "MICHAEL",
+    "WILLIAM",
+    "DAVID",
+    "RICHARD",
+    "JOSEPH",
+    "THOMAS",
+    "CHARLES",
+    "DANIEL",
+    "MATTHEW",
+    "ANTHONY",
+    "MARK",
+    "STEVEN",
+    "PAUL",
+    "ANDREW",
+    "KEVIN",
+    "BRIAN",
+    "ERIC",
+    "MARY",
+    "PATRICIA",
+    "JENNIFER",
+    "LINDA",
+    "ELIZABETH",
+    "SUSAN",
+    "JESSICA",
+    "SARAH",
+    "KAREN",
+    "NANCY",
+    "LISA",
+    "EMILY",
+    "MARIA",
+    "ANNA",
+    "LAURA",
+    "RACHEL",
+    "WEI",
+    "JOSE",
+    "PRIYA",
+    "AHMED",
+]
+
+# Last names are built from two or three of these so large rosters still
+# have mostly distinct people
+surname_syllables = [
+    "AN",
+    "BER",
+    "CAR",
+    "DEL",
+    "EN",
+    "FOR",
+    "GAR",
+    "HAM",
+    "IS",
+    "JOHN",
+    "KIN",
+    "LAN",
+    "MAR",
+    "NEL",
+    "OL",
+    "PER",
+    "QUIN",
+    "ROS",
+    "SON",
+    "TER",
+    "VAL",
+    "WIL",
+    "YOUNG",
+    "ZIM",
+    "BROOK",
+    "STEIN",
+    "MAN",
+    "TON",
+    "LEY",
+    "WOOD",
+    "FIELD",
+    "BERG",
+]
+
+suffixes = ["JR", "SR", "II", "III", "IV"]
+
+# Where the origin state of a licensee comes from in an export
+origin_states = ["CA", "IL", "WA", "NY", "TX", "UT", "GA", "OR", "AK", "OK", "FL"]
+
+# Status each export uses for lapsed licenses; active ones use the first of
+# the schema's active_statuses
+inactive_statuses = {
+    "IL": "NOT RENEWED",
+    "CA": "Expired",
+    "GA": "Lapsed",
+    "NV": "INACTIVE",
+    "HI": "Forfeited",
+    "UT": "Expired",
+    "WA": "Expired",
+    "AK": "Lapsed",
+}
+
+# Stages timed for each scale, in the order the pipeline runs them
+stages = ["ingest", "standardize", "link", "write"]
+
+
+def generate_licensees(count, rng):
+    """
+    Random licensees: name parts, origin state and the date their career
+    starts, as columns of a DataFrame
+    """
+    syllable_count = rng.integers(2, 4, count)
+    syllables = rng.choice(surname_syllables, (count, 3))
+    last_names = pd.Series(syllables[:, 0]) + syllables[:, 1]
+    last_names = last_names.where(
+        syllable_count == 2, last_names + pd.Series(syllables[:, 2])
+    )
+
+    middle_names = pd.Series(rng.choice(first_names, count))
+    middle_names = middle_names.where(rng.random(count) < 0.3, middle_names.str[0])
+    middle_names = middle_names.where(rng.random(count) < 0.7, "")
+
+    suffix = pd.Series(rng.choice(suffixes, count))
+    suffix = suffix.where(rng.random(count) < 0.05, "")
+
+    origin = pd.Series(rng.choice(origin_states, count), dtype=object)
+    origin = origin.where(rng.random(count) < 0.95, None)
+
+    return pd.DataFrame(
+        {
+            "first_name": rng.choice(first_names, count),
+            "middle_name": middle_names,
+            "last_name": last_names,
+            "suffix": suffix,
+            "origin_state": origin,
+            "career_start": pd.Timestamp("1970-01-01")
+            + pd.to_timedelta(rng.integers(0, 18000, count), unit="D"),
+        }
+    )
+
+
+def native_dates(dates, date_format, rng):
+    """
+    Format dates in one of the date_formats of the state schemas
+    """
+    if date_format in ["M/D/YYYY", "M/D/YY"]:
+        years = dates.dt.year.astype(str)
+        if date_format == "M/D/YY":
+            # Only some records carry two digit years
+            years = years.where(rng.random(len(dates)) < 0.5, years.str[2:])
+        return dates.dt.month.astype(str) + "/" + dates.dt.day.astype(str) + "/" + years
+    # Exports whose dates are not read still have them
+    return dates.dt.strftime(date_format or "%Y-%m-%d")
+
+
+def native_roster(licensees, state, rng, active_rate=0.7):
+    """
+    A state export with the columns, name layout, date formats and status
+    values of the state's schema
+    """
+    schema = state_schemas[state]
+    count = len(licensees)
+    licensees = licensees.reset_index(drop=True)
+    # Each state licenses someone at a different point of their career
+    license_dates = licensees["career_start"] + pd.to_timedelta(
+        rng.integers(0, 5000, count), unit="D"
+    )
+    license_dates = license_dates.clip(upper=pd.Timestamp("2024-12-31"))
+    expiration_dates = pd.Timestamp("2023-01-01") + pd.to_timedelta(
+        pd.Series(rng.integers(0, 1460, count)), unit="D"
+    )
+    # Two digit years only make sense for issue dates before 2025
+    expiration_format = schema["date_format"]
+    if expiration_format == "M/D/YY":
+        expiration_format = "M/D/YYYY"
+
+    values = {}
+    if schema.get("full_name"):
+        values["full_name"] = (
+            (
+                licensees["first_name"]
+                + " "
+                + licensees["middle_name"]
+                + " "
+                + licensees["last_name"]
+                + " "
+                + licensees["suffix"]
+            )
+            .str.split()
+            .str.join(" ")
+        )
+    else:
+        values["first_name"] = licensees["first_name"]
+        values["last_name"] = licensees["last_name"]
+        # Blank optional names are missing cells in the exports
+        values["middle_name"] = licensees["middle_name"].replace("", None)
+        values["suffix"] = licensees["suffix"].replace("", None)
+    values["license_date"] = native_dates(license_dates, schema["date_format"], rng)
+    values["expiration_date"] = native_dates(expiration_dates, expiration_format, rng)
+    if schema.get("location_format") == "city_state_zip":
+        values["location"] = "ATLANTA, " + licensees["origin_state"].fillna(state)
+        values["location"] += " 30303"
+    else:
+        values["location"] = licensees["origin_state"]
+    values["status"] = np.where(
+        rng.random(count) < active_rate,
+        schema["active_statuses"][0],
+        inactive_statuses.get(state, "Inactive"),
+    )
+
+    return pd.DataFrame(
+        {
+            schema[field]: values[field]
+            for field in schema_column_fields
+            if schema.get(field)
+        }
+    )
+
+
+def generate_state_rosters(size, overlap=0.2, states=None, seed=0):
+    """
+    Synthetic exports of size rows for each state.
+    overlap is the share of each roster drawn from a pool of licensees shared
+    by all states, sized so a shared licensee holds about three licenses;
+    the rest of each roster is licensed in that state only.
+    """
+    states = states or list(state_exports)
+    rng = np.random.default_rng(seed)
+    shared_count = int(size * overlap)
+    pool = generate_licensees(max(shared_count * len(states) // 3, shared_count), rng)
+
+    rosters = {}
+    for state in states:
+        shared = pool.iloc[rng.choice(len(pool), shared_count, replace=False)]
+        licensees = pd.concat(
+            [shared, generate_licensees(size - shared_count, rng)], ignore_index=True
+        )
+        licensees = licensees.iloc[rng.permutation(size)]
+        rosters[state] = native_roster(licensees, state, rng)
+    return rosters
+
+
+def write_state_rosters(rosters, out_dir):
+    """
+    Write synthetic exports to out_dir in the file format of the real export.
+    Returns a dict like state_exports pointing at them.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    exports = {}
+    for state, roster in rosters.items():
+        extension = os.path.splitext(state_exports[state])[1]
+        path = os.path.join(out_dir, f"{state.lower()}_se{extension}")
+        if extension == ".json":
+            roster.to_json(path, orient="records")
+        else:
+            roster.to_csv(path, index=False)
+        exports[state] = path
+    return exports
+
+
+def run_pipeline(exports, out_dir):
+    """
+    Run the pipeline on a set of exports, timing each stage.
+    Returns seconds per stage.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    dfs = {state: read_state_export(path) for state, path in exports.items()}
+    timings["ingest"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    standardized = {state: standardize_dataset(df, state) for state, df in dfs.items()}
+    timings["standardize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    master_all, master_active = link_master_license_lists(standardized)
+    timings["link"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    write_master_license_list(master_all, os.path.join(out_dir, "master_all_licenses"))
+    write_master_license_list(
+        master_active, os.path.join(out_dir, "master_active_licenses")
+    )
+    write_dashboard_aggregates(
+        master_all, master_active, os.path.join(out_dir, "aggregates")
+    )
+    timings["write"] = time.perf_counter() - start
+    return timings
+
+
+def benchmark(sizes, overlap=0.2, repeat=3, seed=0, work_dir=None):
+    """
+    Time each stage at each roster size, keeping the fastest of repeat runs.
+    Returns a list of result rows.
+    """
+    results = []
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        for size in sizes:
+            out_dir = os.path.join(tmp, str(size))
+            rosters = generate_state_rosters(size, overlap, seed=seed)
+            exports = write_state_rosters(rosters, out_dir)
+            runs = [run_pipeline(exports, out_dir) for _ in range(repeat)]
+            best = {stage: min(run[stage] for run in runs) for stage in stages}
+            results.append(
+                {
+                    "rows_per_state": size,
+                    "total_rows": size * len(rosters),
+                    "overlap": overlap,
+                    **best,
+                    "total": sum(best.values()),
+                }
+            )
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Stages that got slower than the baseline by more than tolerance (a
+    fraction) at the same roster size
+    """
+    previous = {row["rows_per_state"]: row for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get(row["rows_per_state"])
+        if before is None:
+            continue
+        for stage in stages + ["total"]:
+            if row[stage] > before[stage] * (1 + tolerance):
+                regressions.append(
+                    (row["rows_per_state"], stage, before[stage], row[stage])
+                )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time the license pipeline stages on synthetic state exports"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000],
+        help="rows per state export",
+    )
+    parser.add_argument(
+        "--overlap",
+        type=float,
+        default=0.2,
+        help="share of each roster licensed in other states too",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--work-dir", help="where the synthetic exports and outputs are written"
+    )
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument(
+        "--baseline",
+        help="results JSON of an earlier run; exit with status 1 if a stage got "
+        "slower than --tolerance allows",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+    if not 0 <= args.overlap <= 1:
+        parser.error("--overlap must be between 0 and 1")
+
+    results = benchmark(args.sizes, args.overlap, args.repeat, args.seed, args.work_dir)
+
+    print(
+        f"{'rows/state':>12}" + "".join(f"{stage:>13}" for stage in stages + ["total"])
+    )
+    for row in results:
+        print(
+            f"{row['rows_per_state']:>12,}"
+            + "".join(f"{row[stage]:>12.3f}s" for stage in stages + ["total"])
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        for size, stage, before, after in regressions:
+            print(
+                f"Regression at {size:,} rows/state: {stage} {before:.3f}s -> {after:.3f}s"
+            )
+        if regressions:
+            sys.exit(1)
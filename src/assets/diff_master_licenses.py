@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from process_all_licenses import (
+    link_master_license_lists,
+    load_standardized_datasets,
+    read_master_license_list,
+    state_exports,
+)
+
+# Order the change counts are printed in
+changes = ["new_licensee", "new_state", "dropped", "lapsed", "reinstated", "expired"]
+
+
+def dated_state_exports(directory, as_of=None):
+    """
+    The export of each state in directory, named like those of
+    state_exports (20251129_il_se.csv): the latest, or with as_of (YYYYMMDD)
+    the latest dated on or before it
+    """
+    names = os.listdir(directory)
+    exports = {}
+    for state, path in state_exports.items():
+        suffix = f"_{state.lower()}_se{os.path.splitext(path)[1]}"
+        dated = sorted(
+            name
+            for name in names
+            if name.endswith(suffix)
+            and (as_of is None or name[: -len(suffix)] <= as_of)
+        )
+        if not dated:
+            raise FileNotFoundError(f"No {state} export in {directory}")
+        exports[state] = os.path.join(directory, dated[-1])
+    return exports
+
+
+def license_snapshot(master_df):
+    """
+    One row per name_hash and license state of a master list, sorted by
+    them. A person licensed more than once in a state counts as active there
+    if any of those licenses is, with the latest expiration date.
+    """
+    snapshot = (
+        pd.DataFrame(
+            {
+                "name_hash": master_df["name_hash"].astype(object),
+                "license_state": master_df["license_state"].astype(object),
+                "first_name": master_df["first_name"].astype(object),
+                "last_name": master_df["last_name"].astype(object),
+                "license_active": master_df["license_active"] == True,
+                "license_expiration_date": master_df["license_expiration_date"],
+            }
+        )
+        .groupby(["name_hash", "license_state"], sort=True)
+        .agg(
+            first_name=("first_name", "first"),
+            last_name=("last_name", "first"),
+            license_active=("license_active", "any"),
+            license_expiration_date=("license_expiration_date", "max"),
+        )
+        .reset_index()
+    )
+    # name_hash has a fixed width, so the joined keys sort like the pairs
+    snapshot["key"] = snapshot["name_hash"] + "|" + snapshot["license_state"]
+    return snapshot
+
+
+def diff_master_license_lists(old_master, new_master, old_date=None, new_date=None):
+    """
+    Changes between two snapshots of the master list of all licenses, one
+    row per name_hash and license state that changed:
+    new_licensee: a license of someone not in the old snapshot
+    new_state: a new comity state of someone licensed before
+    dropped: a license no longer in the exports
+    lapsed / reinstated: a license that went inactive / active again
+    expired: a license that stayed active whose expiration date falls after
+        old_date and on or before new_date, when both are given
+    The snapshots are joined by merging their sorted keys rather than
+    linking them again. A licensee whose origin state changed between
+    snapshots has a new name_hash, so shows up as new and dropped.
+    """
+    old = license_snapshot(old_master)
+    new = license_snapshot(new_master)
+    old_keys = old["key"].to_numpy(dtype=str)
+    new_keys = new["key"].to_numpy(dtype=str)
+
+    # Merge join: where each new key would go in the sorted old keys, and
+    # whether the old key there is the same
+    positions = np.searchsorted(old_keys, new_keys)
+    matched = np.zeros(len(new_keys), dtype=bool)
+    if len(old_keys):
+        matched = old_keys[np.minimum(positions, len(old_keys) - 1)] == new_keys
+    old_matched = np.zeros(len(old_keys), dtype=bool)
+    old_matched[positions[matched]] = True
+
+    old_people = np.unique(old["name_hash"].to_numpy(dtype=str))
+    known_person = np.isin(new["name_hash"].to_numpy(dtype=str), old_people)
+
+    before = old.iloc[positions[matched]].reset_index(drop=True)
+    after = new[matched].reset_index(drop=True)
+    was_active = before["license_active"].to_numpy()
+    is_active = after["license_active"].to_numpy()
+    change = np.where(
+        was_active & ~is_active,
+        "lapsed",
+        np.where(~was_active & is_active, "reinstated", ""),
+    ).astype(object)
+    if old_date is not None and new_date is not None:
+        expiration = after["license_expiration_date"]
+        expired = (
+            (expiration > pd.Timestamp(old_date))
+            & (expiration <= pd.Timestamp(new_date))
+            & is_active
+            & was_active
+        )
+        change[expired.to_numpy()] = "expired"
+
+    columns = ["name_hash", "license_state", "first_name", "last_name"]
+    changes = pd.concat(
+        [
+            after[columns].assign(
+                change=change,
+                active_before=was_active,
+                active_after=is_active,
+                expiration_before=before["license_expiration_date"],
+                expiration_after=after["license_expiration_date"],
+            )[change != ""],
+            new.loc[~matched, columns].assign(
+                change=np.where(known_person[~matched], "new_state", "new_licensee"),
+                active_after=new.loc[~matched, "license_active"],
+                expiration_after=new.loc[~matched, "license_expiration_date"],
+            ),
+            old.loc[~old_matched, columns].assign(
+                change="dropped",
+                active_before=old.loc[~old_matched, "license_active"],
+                expiration_before=old.loc[~old_matched, "license_expiration_date"],
+            ),
+        ],
+        ignore_index=True,
+    )
+    return changes.sort_values(["name_hash", "license_state"], kind="stable")[
+        columns
+        + [
+            "change",
+            "active_before",
+            "active_after",
+            "expiration_before",
+            "expiration_after",
+        ]
+    ].reset_index(drop=True)
+
+
+def load_snapshot(path, as_of=None):
+    """
+    The master list of all licenses of a snapshot: read from a master list
+    file, or built from the state exports in a directory, dated on or before
+    as_of if given
+    """
+    if not os.path.isdir(path):
+        return read_master_license_list(path)
+    exports = dated_state_exports(path, as_of)
+    for state, export in exports.items():
+        print(f"{state}: {export}")
+    master_all, _ = link_master_license_lists(load_standardized_datasets(exports))
+    return master_all
+
+
+def snapshot_date(date):
+    """
+    A YYYYMMDD snapshot date argument
+    """
+    try:
+        pd.to_datetime(date, format="%Y%m%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{date} is not a YYYYMMDD date")
+    return date
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare two snapshots of the master license list"
+    )
+    parser.add_argument(
+        "old",
+        help="master list file, or directory of dated state exports, of the "
+        "earlier snapshot",
+    )
+    parser.add_argument("new", help="the same of the later snapshot")
+    parser.add_argument(
+        "--old-date",
+        type=snapshot_date,
+        help="date (YYYYMMDD) of the earlier snapshot; picks the exports dated "
+        "on or before it from a directory",
+    )
+    parser.add_argument(
+        "--new-date", type=snapshot_date, help="date (YYYYMMDD) of the later snapshot"
+    )
+    parser.add_argument("--output", default="master_license_changes.csv")
+    args = parser.parse_args()
+
+    old_master = load_snapshot(args.old, args.old_date)
+    new_master = load_snapshot(args.new, args.new_date)
+    diff = diff_master_license_lists(
+        old_master,
+        new_master,
+        args.old_date and pd.to_datetime(args.old_date, format="%Y%m%d"),
+        args.new_date and pd.to_datetime(args.new_date, format="%Y%m%d"),
+    )
+    diff.to_csv(args.output, index=False, date_format="%Y-%m-%d")
+
+    print(f"\nLicenses compared: {len(old_master):,} -> {len(new_master):,}")
+    counts = diff["change"].value_counts()
+    for change in changes:
+        print(f"{change}: {counts.get(change, 0):,}")
+    comity = diff.loc[diff["change"] == "new_state", "name_hash"].nunique()
+    print(f"Licensees with new comity states: {comity:,}")
+    if not (args.old_date and args.new_date):
+        print("Expired licenses need --old-date and --new-date")
+    print(f"Changes written to {args.output}")
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import json
+import os
+import traceback
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from license_cube import LicenseCube, count_aggregates, dashboard_aggregates
+from license_index import LicenseIndex
+from process_all_licenses import read_master_license_list
+
+# Dashboard endpoint to the aggregate it serves
+endpoints = {
+    "/states": "state-license-count",
+    "/state-by-origin": "state-count",
+    "/state-by-year": "state-by-year",
+    "/license-age": "license-age",
+    "/licensees": "licenses-by-licensee-count",
+}
+
+# Aggregates count_aggregates builds from the count cubes
+counted_aggregates = ["state-license-count", "state-count", "state-by-year"]
+
+# Name search over the master list of all licenses: last=SMITH&first=J finds
+# SMITHs whose first name starts with J, last=SM* last names starting with
+# SM, and state=UT,CA only licenses of those states
+search_endpoint = "/search"
+
+reasons = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+# Response bodies each MasterIndex keeps, least recently used evicted first;
+# every distinct name search is a new query
+response_cache_size = 4096
+
+
+def file_signature(path):
+    """
+    Modification time and size of a file, to tell when it was rewritten
+    """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class MasterIndex:
+    """
+    The master lists held in memory with row positions by license state,
+    license year and name_hash, a LicenseIndex for name search, their
+    LicenseCubes and dashboard aggregates, and the responses last built from
+    them
+    """
+
+    def __init__(self, all_path, active_path):
+        self.paths = {"all": all_path, "active": active_path}
+        self.signature = {
+            name: file_signature(path) for name, path in self.paths.items()
+        }
+        self.masters = {
+            name: read_master_license_list(path) for name, path in self.paths.items()
+        }
+        self.by_state = {}
+        self.by_year = {}
+        self.by_name_hash = {}
+        for name, master in self.masters.items():
+            master = master.reset_index(drop=True)
+            self.masters[name] = master
+            self.by_state[name] = master.groupby("license_state", observed=True).indices
+            self.by_year[name] = master.groupby("license_year").indices
+            self.by_name_hash[name] = master.groupby("name_hash").indices
+        self.lookup = LicenseIndex.build(self.masters["all"])
+        self.cubes = {
+            name: LicenseCube.build(master) for name, master in self.masters.items()
+        }
+        self.aggregates = dashboard_aggregates(
+            self.masters["all"], self.masters["active"]
+        )
+        self.responses = {}
+
+    def is_stale(self):
+        """
+        Whether either master file changed since it was loaded
+        """
+        try:
+            return any(
+                file_signature(path) != self.signature[name]
+                for name, path in self.paths.items()
+            )
+        except FileNotFoundError:
+            # Mid rewrite; keep serving what is loaded
+            return False
+
+    def rows(self, name, state=None, year=None):
+        """
+        Rows of one master list, optionally only one license state and year
+        """
+        master = self.masters[name]
+        positions = None
+        for index, key in [(self.by_state[name], state), (self.by_year[name], year)]:
+            if key is None:
+                continue
+            selected = index.get(key, np.array([], dtype=np.intp))
+            positions = (
+                selected if positions is None else np.intersect1d(positions, selected)
+            )
+        return master if positions is None else master.iloc[np.sort(positions)]
+
+    def response(self, path, query):
+        """
+        JSON body for an endpoint, built once per path and query while it
+        stays among the response_cache_size most recently used
+        """
+        key = (
+            path,
+            tuple(sorted((name, values[-1]) for name, values in query.items())),
+        )
+        responses = self.responses
+        body = responses.pop(key, None)
+        if body is None:
+            body = json.dumps(self.build(path, query), separators=(",", ":")).encode()
+        # Dicts keep insertion order, so the first key is the least recently used
+        responses[key] = body
+        if len(responses) > response_cache_size:
+            del responses[next(iter(responses))]
+        return body
+
+    def build(self, path, query):
+        """
+        Data for an endpoint; state and year queries of the license counts
+        slice the count cubes, and of the other aggregates aggregate only the
+        rows of that license state and year, found through the indexes
+        """
+        state = query.get("state", [None])[-1]
+        year = query.get("year", [None])[-1]
+        if year is not None:
+            year = float(year)
+
+        if path.startswith("/licensees/"):
+            name_hash = path[len("/licensees/") :]
+            positions = self.by_name_hash["all"].get(name_hash)
+            if positions is None:
+                raise KeyError(name_hash)
+            return json.loads(
+                self.masters["all"]
+                .iloc[positions]
+                .to_json(orient="records", date_format="iso")
+            )
+
+        if path == search_endpoint:
+            last_name = query.get("last", [""])[-1]
+            if not last_name.rstrip("*"):
+                raise ValueError(f"{search_endpoint} needs a last name")
+            rows = self.lookup.search(
+                last_name.rstrip("*"),
+                query.get("first", [""])[-1].rstrip("*"),
+                None if state is None else state.split(","),
+                last_prefix=last_name.endswith("*"),
+            )
+            return self.lookup.records(rows)
+
+        if state is None and year is None:
+            return self.aggregates[endpoints[path]]
+
+        if endpoints[path] in counted_aggregates:
+            selection = {"license_state": state, "license_year": year}
+            selection = {
+                dimension: label
+                for dimension, label in selection.items()
+                if label is not None
+            }
+            return count_aggregates(
+                self.cubes["all"].slice(**selection),
+                self.cubes["active"].slice(**selection),
+            )[endpoints[path]]
+
+        return dashboard_aggregates(
+            self.rows("all", state, year), self.rows("active", state, year)
+        )[endpoints[path]]
+
+
+class LicenseApi:
+    """
+    Serves the dashboard endpoints from a MasterIndex, reloading it when the
+    master files change
+    """
+
+    def __init__(self, all_path, active_path):
+        self.all_path = all_path
+        self.active_path = active_path
+        self.index = None
+        self.lock = asyncio.Lock()
+
+    async def current_index(self):
+        async with self.lock:
+            if self.index is None or self.index.is_stale():
+                loop = asyncio.get_running_loop()
+                self.index = await loop.run_in_executor(
+                    None, MasterIndex, self.all_path, self.active_path
+                )
+        return self.index
+
+    async def respond(self, request_line):
+        """
+        Status and body of the response to a request line
+        """
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3:
+            return 400, {"error": "malformed request"}
+        if parts[0] != "GET":
+            return 405, {"error": f"{parts[0]} not allowed"}
+
+        url = urlsplit(parts[1])
+        path = url.path.rstrip("/") or "/"
+        if not (
+            path in endpoints
+            or path == search_endpoint
+            or path.startswith("/licensees/")
+        ):
+            return 404, {"error": f"{path} not found"}
+        index = await self.current_index()
+        try:
+            return 200, index.response(path, parse_qs(url.query))
+        except KeyError:
+            return 404, {"error": f"{path} not found"}
+        except ValueError as e:
+            return 400, {"error": str(e)}
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            # Headers are not needed; read past them
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+
+            try:
+                status, body = await self.respond(request_line)
+            except Exception:
+                traceback.print_exc()
+                status, body = 500, {"error": "internal server error"}
+
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode()
+            writer.write(
+                (
+                    f"HTTP/1.1 {status} {reasons[status]}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode()
+                + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(all_path, active_path, host, port):
+    api = LicenseApi(all_path, active_path)
+    # Load before accepting connections so the first request is fast too
+    await api.current_index()
+    server = await asyncio.start_server(api.handle, host, port)
+    print(f"Serving {all_path} and {active_path} on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve the dashboard endpoints from the master license lists"
+    )
+    parser.add_argument("--all", default="master_all_licenses.csv")
+    parser.add_argument("--active", default="master_active_licenses.csv")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.all, args.active, args.host, args.port))
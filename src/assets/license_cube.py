@@ -0,0 +1,222 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Dimensions the dashboard slices license counts by. first_license splits
+# new from reciprocal licenses in state-by-year.
+cube_dimensions = [
+    "license_state",
+    "origin_state",
+    "license_year",
+    "license_active",
+    "first_license",
+    "match_confidence",
+]
+cube_flag_dimensions = ["license_active", "first_license"]
+
+
+class LicenseCube:
+    """
+    Counts of master list rows for every combination of the labels of some
+    dimensions, as a dense array with one axis per dimension.
+    Missing states and match confidences are labelled "", and undated rows
+    have a NaN license_year, sorted after the years.
+    """
+
+    def __init__(self, dimensions, labels, counts):
+        self.dimensions = list(dimensions)
+        self.labels = labels
+        self.counts = counts
+
+    @classmethod
+    def build(cls, master_df, dimensions=cube_dimensions):
+        """
+        Count the rows of a master list in one pass: the label codes of each
+        row are combined into its cell's flat position and counted with
+        bincount
+        """
+        codes = []
+        labels = {}
+        for dimension in dimensions:
+            values = master_df[dimension]
+            if dimension in cube_flag_dimensions:
+                values = values == True
+            elif dimension != "license_year":
+                values = values.astype(object).fillna("")
+            dimension_codes, uniques = pd.factorize(
+                values, sort=True, use_na_sentinel=False
+            )
+            codes.append(dimension_codes)
+            labels[dimension] = np.asarray(uniques)
+
+        shape = tuple(len(labels[dimension]) for dimension in dimensions)
+        if len(master_df):
+            cells = np.ravel_multi_index(codes, shape)
+            counts = np.bincount(cells, minlength=int(np.prod(shape)))
+        else:
+            counts = np.zeros(int(np.prod(shape)), dtype=np.int64)
+        return cls(dimensions, labels, counts.reshape(shape))
+
+    def rollup(self, *dimensions):
+        """
+        The cube summed over every dimension not listed
+        """
+        summed = tuple(
+            axis
+            for axis, dimension in enumerate(self.dimensions)
+            if dimension not in dimensions
+        )
+        kept = [dimension for dimension in self.dimensions if dimension in dimensions]
+        counts = self.counts.sum(axis=summed)
+        # Axes in the order asked for
+        counts = np.moveaxis(
+            counts,
+            [kept.index(dimension) for dimension in dimensions],
+            range(len(kept)),
+        )
+        return LicenseCube(
+            dimensions,
+            {dimension: self.labels[dimension] for dimension in dimensions},
+            counts,
+        )
+
+    def slice(self, **selection):
+        """
+        The cube with some dimensions limited to one label or a list of them;
+        a label no row has leaves that dimension empty
+        """
+        counts = self.counts
+        labels = dict(self.labels)
+        for dimension, selected in selection.items():
+            axis = self.dimensions.index(dimension)
+            if not isinstance(selected, list):
+                selected = [selected]
+            positions = np.flatnonzero(
+                np.isin(labels[dimension], np.array(selected, dtype=object))
+            )
+            counts = np.take(counts, positions, axis=axis)
+            labels[dimension] = labels[dimension][positions]
+        return LicenseCube(self.dimensions, labels, counts)
+
+    def cumulative(self, dimension="license_year"):
+        """
+        Running totals along a dimension, leaving out NaN labels
+        """
+        known = pd.notna(self.labels[dimension])
+        cube = self.slice(**{dimension: list(self.labels[dimension][known])})
+        axis = self.dimensions.index(dimension)
+        return LicenseCube(
+            self.dimensions, cube.labels, np.cumsum(cube.counts, axis=axis)
+        )
+
+    def cells(self):
+        """
+        Labels and count of each non-empty cell, in label order
+        """
+        for position in zip(*np.nonzero(self.counts)):
+            yield tuple(
+                self.labels[dimension][i]
+                for dimension, i in zip(self.dimensions, position)
+            ), int(self.counts[position])
+
+
+def count_aggregates(cube_all, cube_active):
+    """
+    The dashboard aggregates that count licenses, from the LicenseCubes of
+    the master lists
+    """
+    by_year = {}
+    years = cube_all.labels["license_year"]
+    dated = cube_all.slice(license_year=list(years[pd.notna(years)]))
+    for metric, dimension, statuses in [
+        ("active_status", "license_active", {True: "Active", False: "Inactive"}),
+        ("license_type", "first_license", {True: "New", False: "Reciprocal"}),
+    ]:
+        rows = [
+            {
+                "state": state,
+                "year": int(year),
+                "status": statuses[flag],
+                "count": count,
+            }
+            for (state, year, flag), count in dated.rollup(
+                "license_state", "license_year", dimension
+            ).cells()
+        ]
+        by_year[metric] = sorted(
+            rows, key=lambda row: (row["state"], row["year"], row["status"])
+        )
+
+    return {
+        "state-license-count": [
+            {"license_state": state, "count": count}
+            for (state,), count in cube_active.rollup("license_state").cells()
+        ],
+        "state-count": [
+            {"license_state": state, "origin_state": origin or None, "count": count}
+            for (state, origin), count in cube_active.rollup(
+                "license_state", "origin_state"
+            ).cells()
+        ],
+        "state-by-year": by_year,
+    }
+
+
+def dashboard_aggregates(master_all, master_active):
+    """
+    Compute the data behind each dashboard loader from the master lists.
+    Returns a dict of file name to JSON-ready data:
+    state-license-count: active licenses per state
+    state-count: active licenses per state and origin state
+    state-by-year: licenses per state and year, by active status and by
+        new/reciprocal license
+    licenses-by-licensee-count: states of the active licenses of each person
+    license-age: first license date of each person, with whether they hold an
+        active license or else when their last license expired
+    """
+    # Columnar master lists keep states as categoricals
+    active_states = master_active["license_state"].astype(object)
+
+    licensee_states = active_states.groupby(master_active["name_hash"], sort=True).agg(
+        list
+    )
+
+    people = (
+        master_all.assign(active=master_all["license_active"] == True)
+        .groupby("name_hash", sort=True)
+        .agg(
+            active=("active", "any"),
+            license_date=("license_date", "min"),
+            expiration_date=("license_expiration_date", "max"),
+        )
+    )
+    license_age = {}
+    for name_hash, person in zip(people.index, people.itertuples(index=False)):
+        entry = {"active": True} if person.active else {}
+        if pd.notna(person.license_date):
+            entry["license_date"] = person.license_date.strftime("%Y-%m-%d")
+        if not person.active and pd.notna(person.expiration_date):
+            entry["expiration_date"] = person.expiration_date.strftime("%Y-%m-%d")
+        license_age[name_hash] = entry
+
+    return {
+        **count_aggregates(
+            LicenseCube.build(master_all), LicenseCube.build(master_active)
+        ),
+        "licenses-by-licensee-count": licensee_states.to_dict(),
+        "license-age": license_age,
+    }
+
+
+def write_dashboard_aggregates(master_all, master_active, out_dir):
+    """
+    Write the dashboard aggregates as one JSON file per loader in out_dir
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    for name, data in dashboard_aggregates(master_all, master_active).items():
+        path = os.path.join(out_dir, f"{name}.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
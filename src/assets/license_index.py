@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from process_all_licenses import clean_name, read_master_license_list
+
+# Separates last and first name in the sorted name keys; it sorts before any
+# character a cleaned name can hold
+name_separator = b"\x1f"
+
+# Master columns kept in the index, and how each is stored
+string_columns = [
+    "name_hash",
+    "license_state",
+    "first_name",
+    "middle_name",
+    "last_name",
+    "match_confidence",
+    "origin_state",
+]
+date_columns = ["license_date", "license_expiration_date"]
+flag_columns = ["license_active", "first_license"]
+
+# oldest_active_license as stored: -1 where the master list has "N/A"; a
+# master list read back from CSV holds the flags as strings
+oldest_codes = {True: 1, False: 0, "True": 1, "False": 0}
+oldest_values = {1: True, 0: False, -1: "N/A"}
+
+index_version = 1
+
+
+def encoded_strings(values):
+    """
+    A column of strings as a fixed width UTF-8 bytes array, "" where missing
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    # Encode each distinct string once; the code of missing values, -1,
+    # picks the "" appended last
+    encoded = [str(value).encode("utf-8") for value in uniques] + [b""]
+    return np.array(encoded, dtype=bytes)[codes]
+
+
+class LicenseIndex:
+    """
+    Lookup index over a master license list.
+    Rows are held sorted by last name then first name, so a name or name
+    prefix is one contiguous range found by binary search. name_hash lookups
+    binary search a sorted copy of the hashes, and each license state has a
+    sorted posting list of its rows to narrow a range to some states.
+    Every part is a NumPy array, so an index saved with save can be loaded
+    memory-mapped.
+    """
+
+    def __init__(self, arrays, states):
+        self.arrays = arrays
+        self.states = states
+        self.state_ids = {state: i for i, state in enumerate(states)}
+
+    @classmethod
+    def build(cls, master_df):
+        separator = name_separator.decode("utf-8")
+        keys = encoded_strings(
+            master_df["last_name"].fillna("").astype(str)
+            + separator
+            + master_df["first_name"].fillna("").astype(str)
+        )
+        order = np.argsort(keys, kind="stable")
+
+        arrays = {"name_keys": keys[order]}
+        for column in string_columns:
+            arrays[column] = encoded_strings(master_df[column].to_numpy()[order])
+        for column in date_columns:
+            arrays[column] = (
+                master_df[column].to_numpy(dtype="datetime64[ns]")[order]
+            ).astype("datetime64[D]")
+        for column in flag_columns:
+            arrays[column] = master_df[column].to_numpy(dtype=bool)[order]
+        oldest = master_df["oldest_active_license"].map(oldest_codes)
+        arrays["oldest_active_license"] = oldest.fillna(-1).to_numpy(np.int8)[order]
+
+        hash_order = np.argsort(arrays["name_hash"], kind="stable")
+        arrays["hash_order"] = hash_order
+        arrays["hash_keys"] = arrays["name_hash"][hash_order]
+
+        # Posting lists: the rows of each license state, concatenated, with
+        # the offset each state's rows start at
+        state_codes, states = pd.factorize(arrays["license_state"], sort=True)
+        by_state = np.argsort(state_codes, kind="stable")
+        arrays["state_rows"] = by_state
+        arrays["state_offsets"] = np.searchsorted(
+            state_codes[by_state], np.arange(len(states) + 1)
+        )
+        return cls(arrays, [state.decode("utf-8") for state in states])
+
+    def save(self, directory):
+        """
+        Write the index to a directory of .npy files
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+        with open(os.path.join(directory, "index.json"), "w") as f:
+            json.dump({"version": index_version, "states": self.states}, f)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        Load an index written by save, memory-mapping its arrays unless mmap
+        is False
+        """
+        with open(os.path.join(directory, "index.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != index_version:
+            raise ValueError(f"{directory} holds an index of another version")
+
+        arrays = {}
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".npy"):
+                arrays[entry.name[:-4]] = np.load(
+                    entry.path, mmap_mode="r" if mmap else None
+                )
+        return cls(arrays, meta["states"])
+
+    def __len__(self):
+        return len(self.arrays["name_keys"])
+
+    def by_name_hash(self, name_hash):
+        """
+        Rows of every license held by the person with this name_hash
+        """
+        keys = self.arrays["hash_keys"]
+        name_hash = name_hash.encode("utf-8")
+        start = np.searchsorted(keys, name_hash, side="left")
+        end = np.searchsorted(keys, name_hash, side="right")
+        return np.sort(self.arrays["hash_order"][start:end])
+
+    def search(self, last_name, first_name="", states=None, last_prefix=False):
+        """
+        Rows of licensees with this last name, or with last_prefix, a last
+        name starting with last_name, whose first name starts with
+        first_name. states optionally limits the rows to some license states.
+        Names are cleaned like the master list's.
+        """
+        prefix = clean_name(last_name).encode("utf-8")
+        first_prefix = clean_name(first_name).encode("utf-8")
+        if not last_prefix:
+            prefix += name_separator + first_prefix
+        keys = self.arrays["name_keys"]
+        start = np.searchsorted(keys, prefix, side="left")
+        # No UTF-8 byte is 0xFF, so this sorts after every key with the prefix
+        end = np.searchsorted(keys, prefix + b"\xff", side="left")
+        rows = self.rows_in_states(start, end, states)
+        if last_prefix and first_prefix and len(rows):
+            # The range spans many last names; check each row's first name
+            first_names = np.char.partition(keys[rows], name_separator)[:, 2]
+            rows = rows[np.char.startswith(first_names, first_prefix)]
+        return rows
+
+    def rows_in_states(self, start, end, states=None):
+        """
+        Rows in the range [start, end) licensed in one of states, all of them
+        if states is None
+        """
+        if states is None:
+            return np.arange(start, end)
+
+        rows = []
+        state_rows = self.arrays["state_rows"]
+        offsets = self.arrays["state_offsets"]
+        for state in states:
+            i = self.state_ids.get(state)
+            if i is None:
+                continue
+            postings = state_rows[offsets[i] : offsets[i + 1]]
+            rows.append(
+                postings[
+                    np.searchsorted(postings, start) : np.searchsorted(postings, end)
+                ]
+            )
+        if not rows:
+            return np.array([], dtype=np.int64)
+        return np.sort(np.concatenate(rows))
+
+    def records(self, rows):
+        """
+        The master rows at these positions as dicts, with ISO dates and the
+        same values the master CSV holds
+        """
+        arrays = self.arrays
+        records = []
+        for row in rows:
+            record = {
+                column: arrays[column][row].decode("utf-8") for column in string_columns
+            }
+            for column in date_columns:
+                date = arrays[column][row]
+                record[column] = None if np.isnat(date) else str(date)
+            record["license_year"] = (
+                None
+                if record["license_date"] is None
+                else int(record["license_date"][:4])
+            )
+            for column in flag_columns:
+                record[column] = bool(arrays[column][row])
+            record["oldest_active_license"] = oldest_values[
+                int(arrays["oldest_active_license"][row])
+            ]
+            records.append(record)
+        return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build or query a lookup index over a master license list"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index a master license list")
+    build.add_argument("--master", default="master_all_licenses.csv")
+    build.add_argument("--out", default="license_index")
+    query = commands.add_parser("query", help="look licensees up in an index")
+    query.add_argument("--index", default="license_index")
+    query.add_argument("--name-hash")
+    query.add_argument("--last", help="last name")
+    query.add_argument("--first", default="", help="first name prefix")
+    query.add_argument(
+        "--last-prefix",
+        action="store_true",
+        help="match last names starting with --last",
+    )
+    query.add_argument("--state", nargs="+", help="only these license states")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = LicenseIndex.build(read_master_license_list(args.master))
+        index.save(args.out)
+        print(f"Indexed {len(index):,} licenses in {args.out}")
+    else:
+        if not args.name_hash and not args.last:
+            parser.error("query needs --name-hash or --last")
+        index = LicenseIndex.load(args.index)
+        start = time.perf_counter()
+        if args.name_hash:
+            rows = index.by_name_hash(args.name_hash)
+        else:
+            rows = index.search(args.last, args.first, args.state, args.last_prefix)
+        elapsed = time.perf_counter() - start
+        for record in index.records(rows):
+            print(json.dumps(record))
+        print(f"{len(rows):,} licenses found in {elapsed * 1e6:.0f} microseconds")
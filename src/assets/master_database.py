@@ -0,0 +1,157 @@
+import os
+import sqlite3
+
+import numpy as np
+
+# Columns of the master license tables in SQLite. Dates are ISO strings,
+# flags 0 or 1, and oldest_active_license is NULL where the CSV has "N/A".
+master_sqlite_columns = {
+    "name_hash": "TEXT NOT NULL",
+    "license_state": "TEXT NOT NULL",
+    "first_name": "TEXT",
+    "middle_name": "TEXT",
+    "last_name": "TEXT",
+    "match_confidence": "TEXT",
+    "license_date": "TEXT",
+    "license_year": "INTEGER",
+    "origin_state": "TEXT",
+    "license_active": "INTEGER NOT NULL",
+    "license_expiration_date": "TEXT",
+    "first_license": "INTEGER NOT NULL",
+    "oldest_active_license": "INTEGER",
+}
+master_sqlite_indexes = ["name_hash", "license_state", "origin_state", "license_year"]
+
+# Summary views of the master license database, the SQL counterparts of the
+# dashboard aggregates
+master_sqlite_views = {
+    "state_license_counts": """
+        SELECT license_state, COUNT(*) AS count
+        FROM master_active_licenses
+        GROUP BY license_state
+    """,
+    "state_origin_counts": """
+        SELECT license_state, origin_state, COUNT(*) AS count
+        FROM master_active_licenses
+        GROUP BY license_state, origin_state
+    """,
+    "state_year_counts": """
+        SELECT license_state, license_year,
+            SUM(license_active) AS active,
+            SUM(1 - license_active) AS inactive,
+            SUM(first_license) AS new,
+            SUM(1 - first_license) AS reciprocal
+        FROM master_all_licenses
+        WHERE license_year IS NOT NULL
+        GROUP BY license_state, license_year
+    """,
+    "licensee_license_counts": """
+        SELECT name_hash, COUNT(*) AS licenses,
+            GROUP_CONCAT(license_state) AS license_states
+        FROM master_active_licenses
+        GROUP BY name_hash
+    """,
+    "licensee_ages": """
+        SELECT name_hash, MAX(license_active) AS active,
+            MIN(license_date) AS license_date,
+            MAX(license_expiration_date) AS expiration_date
+        FROM master_all_licenses
+        GROUP BY name_hash
+    """,
+    "match_confidence_counts": """
+        SELECT match_confidence, COUNT(*) AS all_count,
+            SUM(license_active) AS active_count
+        FROM master_all_licenses
+        GROUP BY match_confidence
+    """,
+}
+
+
+def master_sqlite_values(master_df):
+    """
+    Columns of a master list as lists of values SQLite can bind, in the order
+    of master_sqlite_columns
+    """
+
+    def nullable(values, present):
+        values = np.asarray(values).astype(object)
+        values[~np.asarray(present, dtype=bool)] = None
+        return values.tolist()
+
+    columns = {}
+    for column in [
+        "name_hash",
+        "license_state",
+        "first_name",
+        "middle_name",
+        "last_name",
+        "match_confidence",
+    ]:
+        values = master_df[column].astype(object)
+        columns[column] = nullable(values, values.notna())
+    for column in ["license_date", "license_expiration_date"]:
+        dates = master_df[column]
+        columns[column] = nullable(
+            np.datetime_as_string(dates.to_numpy(dtype="datetime64[D]")),
+            dates.notna(),
+        )
+    years = master_df["license_year"]
+    columns["license_year"] = nullable(years.fillna(0).astype(np.int64), years.notna())
+    origins = master_df["origin_state"].astype(object)
+    columns["origin_state"] = nullable(origins, origins.notna() & (origins != ""))
+    for column in ["license_active", "first_license"]:
+        flags = master_df[column].astype(bool).astype(np.int64)
+        columns[column] = flags.astype(object).tolist()
+    oldest = master_df["oldest_active_license"].map({True: 1, False: 0})
+    columns["oldest_active_license"] = nullable(
+        oldest.fillna(0).astype(np.int64), oldest.notna()
+    )
+    return [columns[column] for column in master_sqlite_columns]
+
+
+def write_master_license_database(master_all, master_active, path):
+    """
+    Load both master lists into a SQLite database as the tables
+    master_all_licenses and master_active_licenses, indexed on
+    master_sqlite_indexes, with the master_sqlite_views.
+    The database is built in a temporary file and moved over path, so readers
+    never see it half written.
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    connection = sqlite3.connect(temp_path)
+    try:
+        # Nothing else opens the temporary file, so skip the journal and syncs
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        columns = ", ".join(
+            f"{name} {kind}" for name, kind in master_sqlite_columns.items()
+        )
+        placeholders = ", ".join("?" * len(master_sqlite_columns))
+        tables = {
+            "master_all_licenses": master_all,
+            "master_active_licenses": master_active,
+        }
+        for table, master_df in tables.items():
+            connection.execute(f"CREATE TABLE {table} ({columns})")
+            if len(master_df):
+                connection.executemany(
+                    f"INSERT INTO {table} VALUES ({placeholders})",
+                    zip(*master_sqlite_values(master_df)),
+                )
+            # Indexing once after the bulk insert beats updating the indexes
+            # row by row
+            for column in master_sqlite_indexes:
+                connection.execute(
+                    f"CREATE INDEX {table}_{column} ON {table} ({column})"
+                )
+        for view, query in master_sqlite_views.items():
+            connection.execute(f"CREATE VIEW {view} AS {query}")
+        connection.execute("ANALYZE")
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(temp_path, path)
+    return path
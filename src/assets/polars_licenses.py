@@ -0,0 +1,354 @@
+import pandas as pd
+
+from process_all_licenses import (
+    clean_names,
+    cleaned_names,
+    compact_license_records,
+    date_formats,
+    date_shaped,
+    export_columns,
+    extract_names_parts,
+    extracted_name_parts,
+    full_name_parts_pattern,
+    full_name_suffix_pattern,
+    location_formats,
+    name_punctuation_pattern,
+    name_title_pattern,
+    parse_date,
+    quality_fields,
+    standardized_dtypes,
+    state_mapping,
+    state_schemas,
+    validate_dataset,
+)
+
+# The strings pandas.read_csv reads as missing, so the Polars scans see the
+# same missing cells as read_state_export
+csv_na_values = [
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+]
+
+
+def scan_state_export(path, state):
+    """
+    Lazy Polars scan of a state export with every column as a string.
+    Only the columns of the state's schema are read from CSV exports; JSON
+    exports are parsed whole and then projected.
+    """
+    import polars as pl
+
+    columns = export_columns(state)
+    if path.endswith(".json"):
+        records = pl.read_json(path, infer_schema_length=None).lazy()
+        present = records.collect_schema().names()
+        return records.select(
+            [
+                (
+                    pl.col(column).cast(pl.String)
+                    if column in present
+                    else pl.lit(None, pl.String).alias(column)
+                )
+                for column in columns
+            ]
+        )
+    return pl.scan_csv(path, infer_schema=False, null_values=csv_na_values).select(
+        columns
+    )
+
+
+# Names of printable ASCII only, which Polars' regexes treat exactly like
+# Python's; anything else is cleaned and split by the Python functions
+plain_name_pattern = r"^[ -~]*$"
+
+
+def clean_name_expr(names):
+    """
+    Polars expression cleaning plain names like clean_name
+    """
+    return (
+        names.str.to_uppercase()
+        .str.replace(r"(?i)" + name_title_pattern.pattern, "")
+        .str.replace_all(name_punctuation_pattern.pattern, " ")
+        .str.replace_all(r"\s+", " ")
+        .str.strip_chars()
+    )
+
+
+def clean_name_batch(names):
+    """
+    clean_name for the names of a Polars Series that are not plain, through
+    the cleaned_names cache; plain and missing names are left null
+    """
+    import polars as pl
+
+    uniques = names.drop_nulls().unique()
+    uniques = uniques.filter(~uniques.str.contains(plain_name_pattern))
+    cleaned = cleaned_names.lookup(uniques.to_list(), clean_names)
+    return names.replace_strict(
+        uniques, pl.Series(cleaned, dtype=pl.String), default=None
+    )
+
+
+def clean_name_column_expr(column):
+    """
+    Polars expression for clean_name_column
+    """
+    import polars as pl
+
+    names = pl.col(column)
+    return (
+        pl.when(names.str.contains(plain_name_pattern))
+        .then(clean_name_expr(names))
+        .otherwise(names.map_batches(clean_name_batch, return_dtype=pl.String))
+        .fill_null("")
+    )
+
+
+def name_parts_batch(names):
+    """
+    extract_name_parts for the names of a Polars Series of cleaned names that
+    are not plain, through the extracted_name_parts cache. Returns a struct
+    Series of the parts, null for plain names.
+    """
+    import polars as pl
+
+    name_parts = ["first_name", "middle_name", "last_name", "suffix"]
+    uniques = names.unique()
+    uniques = uniques.filter(~uniques.str.contains(plain_name_pattern))
+    parts = extracted_name_parts.lookup(uniques.to_list(), extract_names_parts)
+    lookup = pl.DataFrame(
+        {
+            "name": uniques,
+            **{
+                part: pl.Series([values[i] for values in parts], dtype=pl.String)
+                for i, part in enumerate(name_parts)
+            },
+        }
+    )
+    return (
+        names.to_frame("name")
+        .join(lookup, on="name", how="left", maintain_order="left")
+        .select(name_parts)
+        .to_struct("parts")
+    )
+
+
+def name_parts_exprs(cleaned):
+    """
+    Polars expressions for the columns of extract_name_parts_column
+    """
+    import polars as pl
+
+    name_parts = ["first_name", "middle_name", "last_name", "suffix"]
+    suffixed = cleaned.str.extract_groups(full_name_suffix_pattern.pattern)
+    rest = suffixed.struct.field("rest").fill_null(cleaned)
+    parts = rest.str.extract_groups(full_name_parts_pattern.pattern)
+    fallback = cleaned.map_batches(
+        name_parts_batch,
+        return_dtype=pl.Struct({part: pl.String for part in name_parts}),
+    )
+    plain = cleaned.str.contains(plain_name_pattern)
+    return [
+        pl.when(plain)
+        .then(
+            (suffixed if part == "suffix" else parts).struct.field(part).fill_null("")
+        )
+        .otherwise(fallback.struct.field(part))
+        .alias(part)
+        for part in name_parts
+    ]
+
+
+def parse_date_expr(column, date_format):
+    """
+    Polars expression parsing a date column the way parse_date_column's fast
+    path does. Dates it cannot parse are left null for
+    fill_unparsed_dates.
+    """
+    import polars as pl
+
+    if date_format is None:
+        return pl.lit(None, pl.Datetime("ns"))
+
+    spec = date_formats[date_format]
+    # Polars' regex engine spells the end of the text \z
+    pattern = spec["pattern"].replace(r"\Z", r"\z")
+    parts = pl.col(column).str.extract_groups(pattern)
+    year = parts.struct.field("year").cast(pl.Int64, strict=False)
+    if spec.get("short_years"):
+        year = (
+            pl.when(year <= 100)
+            .then(year + pl.when(year <= 24).then(2000).otherwise(1900))
+            .otherwise(year)
+        )
+    fields = [
+        year.cast(pl.String),
+        pl.lit("-"),
+        parts.struct.field("month").str.zfill(2),
+        pl.lit("-"),
+        parts.struct.field("day").str.zfill(2),
+    ]
+    layout = "%Y-%m-%d"
+    checked = ["month", "day"]
+    if "(?P<hour>" in spec["pattern"]:
+        for separator, part in [("T", "hour"), (":", "minute"), (":", "second")]:
+            fields += [pl.lit(separator), parts.struct.field(part)]
+            checked.append(part)
+        layout += "T%H:%M:%S"
+
+    # Parsed at microseconds, which span every 4 digit year, so dates outside
+    # what datetime64[ns] holds are left null instead of wrapping around
+    dates = pl.concat_str(fields).str.strptime(pl.Datetime("us"), layout, strict=False)
+    valid = year.is_between(1000, 9999) & dates.is_between(
+        pd.Timestamp.min.ceil("us"), pd.Timestamp.max.floor("us")
+    )
+    # strptime rolls over out of range parts (e.g. 60 seconds) like
+    # pd.to_datetime, so only keep dates whose parts survive the round trip
+    valid &= dates.dt.year() == year
+    for part in checked:
+        value = parts.struct.field(part).cast(pl.Int64, strict=False)
+        valid &= getattr(dates.dt, part)() == value
+    return pl.when(valid).then(dates.cast(pl.Datetime("ns")))
+
+
+def fill_unparsed_dates(raw_dates, dates, date_format):
+    """
+    Parse the dates parse_date_expr left null whose raw cell has the shape
+    of a date with parse_date, as parse_date_column does
+    """
+    if date_format is None:
+        return dates
+    leftover = dates.isna().to_numpy()
+    if leftover.any():
+        leftover[leftover] = date_shaped(raw_dates[leftover], date_format)
+    if not leftover.any():
+        return dates
+
+    fallback = raw_dates[leftover].apply(parse_date, args=(date_format,))
+    if not fallback.notna().any():
+        return dates
+    dates = dates.astype(object).where(dates.notna(), None)
+    dates[leftover] = fallback.to_numpy(dtype=object)
+    return dates.infer_objects()
+
+
+def standardize_lazy(records, state, keep_raw=False):
+    """
+    Polars version of standardize_dataset over a lazy scan of a state export.
+    Returns a lazy frame of the standardized columns plus the raw date columns
+    fill_unparsed_dates needs, and with keep_raw the other raw columns
+    validate_dataset checks, as raw_<field>.
+    """
+    import polars as pl
+
+    schema = state_schemas[state]
+    name_parts = ["first_name", "middle_name", "last_name", "suffix"]
+    columns = []
+    if schema.get("full_name"):
+        columns += name_parts_exprs(clean_name_column_expr(schema["full_name"]))
+    else:
+        for part in name_parts:
+            if schema.get(part):
+                columns.append(clean_name_column_expr(schema[part]).alias(part))
+            else:
+                columns.append(pl.lit("").alias(part))
+
+    for field in ["license_date", "expiration_date"]:
+        column = schema.get(field)
+        if column:
+            columns += [
+                parse_date_expr(column, schema.get("date_format")).alias(field),
+                pl.col(column).alias(f"raw_{field}"),
+            ]
+        else:
+            columns += [
+                pl.lit(None, pl.Datetime("ns")).alias(field),
+                pl.lit(None, pl.String).alias(f"raw_{field}"),
+            ]
+
+    location = schema.get("location")
+    if location and location_formats[schema["location_format"]] is None:
+        mapping = {name: code for name, code in state_mapping.items()}
+        origin = pl.col(location).replace(list(mapping), list(mapping.values()))
+    elif location:
+        pattern = location_formats[schema["location_format"]].pattern
+        origin = pl.col(location).str.extract(pattern, 1)
+    else:
+        origin = pl.lit(None, pl.String)
+    columns.append(origin.alias("origin_state"))
+
+    columns.append(
+        pl.col(schema["status"])
+        .is_in(schema["active_statuses"])
+        .fill_null(False)
+        .alias("license_active")
+    )
+    columns.append(pl.lit(state).alias("source_state"))
+    if keep_raw:
+        columns += [
+            pl.col(schema[field]).alias(f"raw_{field}")
+            for field in quality_fields
+            if schema.get(field) and field not in ["license_date", "expiration_date"]
+        ]
+    return records.select(columns)
+
+
+def load_standardized_datasets_lazy(exports, active_only=False, errors=None):
+    """
+    Read and standardize every state export as one set of lazy Polars plans:
+    scans only read the schema's columns, active_only filters on the status
+    column at scan time, and all states are collected in parallel.
+    Names and date leftovers go through the same Python helpers as the
+    pandas path, so the standardized datasets are identical.
+    The error tables of validate_dataset are appended to errors if given;
+    with active_only their rows count the active records only.
+    """
+    import polars as pl
+
+    plans = {}
+    for state, path in exports.items():
+        records = scan_state_export(path, state)
+        if active_only:
+            schema = state_schemas[state]
+            records = records.filter(
+                pl.col(schema["status"]).is_in(schema["active_statuses"])
+            )
+        plans[state] = standardize_lazy(records, state, keep_raw=errors is not None)
+
+    standardized_dfs = {}
+    for (state, plan), frame in zip(plans.items(), pl.collect_all(plans.values())):
+        df = frame.to_pandas()
+        schema = state_schemas[state]
+        for field in ["license_date", "expiration_date"]:
+            df[field] = fill_unparsed_dates(
+                df[f"raw_{field}"], df[field], schema.get("date_format")
+            )
+        standardized_dfs[state] = compact_license_records(df[list(standardized_dtypes)])
+        if errors is not None:
+            raw = pd.DataFrame(
+                {
+                    schema[field]: df[f"raw_{field}"]
+                    for field in quality_fields
+                    if schema.get(field)
+                }
+            )
+            errors.append(validate_dataset(raw, standardized_dfs[state], state))
+    return standardized_dfs
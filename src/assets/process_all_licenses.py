@@ -1,11 +1,30 @@
 #!/usr/bin/env python3
+import argparse
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
 import pandas as pd
 import numpy as np
 import re
 from math import isnan
 from datetime import datetime
+from itertools import islice
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 import hashlib
 
+from license_cube import write_dashboard_aggregates
+from master_database import write_master_license_database
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; run reports leave out peak RSS there
+    resource = None
+
 state_mapping = {
     "Wyoming": "WY",
     "Wisconsin": "WI",
@@ -47,6 +66,271 @@ state_mapping = {
     "  ": None,
 }
 
+state_exports = {
+    "IL": "./clean/20251129_il_se.csv",
+    "CA": "./clean/20251129_ca_se.csv",
+    "GA": "./clean/20251129_ga_se.json",
+    "NV": "./clean/20251202_nv_se.json",
+    "HI": "./clean/20251201_hi_se.json",
+    "UT": "./clean/20251128_ut_se.csv",
+    "WA": "./clean/20260101_wa_se.json",
+    "OK": "./clean/2025_ok_se.json",
+    "OR": "./clean/20251129_or_se.csv",
+    "AK": "./clean/20251129_ak_se.csv",
+}
+
+# How each state export is read. Adding a state is a matter of adding its
+# schema here and its export to state_exports:
+# - first_name, middle_name, last_name and suffix columns, or a full_name
+#   column split into those parts; a missing middle_name or suffix is ""
+# - license_date and expiration_date columns, and their date_format, a key
+#   of date_formats (None when the export's dates are not read)
+# - a location column and its location_format, a key of location_formats;
+#   without one origin_state is left empty
+# - the status column and the active_statuses marking a license active
+state_schemas = {
+    "IL": {
+        "first_name": "First Name",
+        "middle_name": "Middle",
+        "last_name": "Last Name",
+        "suffix": "Suffix",
+        "license_date": "Original Issue Date",
+        "expiration_date": "Expiration Date",
+        "date_format": "M/D/YYYY",
+        "location": "State",
+        "location_format": "state",
+        "status": "License Status",
+        "active_statuses": ["ACTIVE"],
+    },
+    "CA": {
+        # CA has separate name fields, check first name for title
+        "first_name": "First Name",
+        "middle_name": "Middle Name",
+        "last_name": "Org/Last Name",
+        "license_date": "Original Issue Date",
+        "expiration_date": "Expiration Date",
+        "date_format": "M/D/YY",
+        "location": "State",
+        "location_format": "state",
+        "status": "License Status",
+        "active_statuses": ["Active"],
+    },
+    "GA": {
+        "full_name": "fullName",
+        "license_date": "issueDate",
+        "expiration_date": "expirationDate",
+        "date_format": "%Y-%m-%d",
+        "location": "location",
+        "location_format": "city_state_zip",
+        "status": "licenseStatus",
+        "active_statuses": ["Active", "Active-Renewal Pending"],
+    },
+    "NV": {
+        "full_name": "full_name",
+        "expiration_date": "expiration_date",
+        "date_format": None,
+        "location": "state",
+        "location_format": "state",
+        "status": "status",
+        "active_statuses": ["ACTIVE"],
+    },
+    "HI": {
+        "full_name": "full_name",
+        "license_date": "original_license_date",
+        "expiration_date": "expiration_date",
+        "date_format": "M/D/YYYY",
+        "status": "status",
+        "active_statuses": ["Current, Valid & In Good Standing"],
+    },
+    "UT": {
+        "full_name": "FULL NAME",
+        "license_date": "ISSUE DATE",
+        "expiration_date": "EXPIRATION DATE",
+        "date_format": "%Y-%m-%d",
+        "location": "STATE",
+        "location_format": "state",
+        "status": "LICENSE STATUS",
+        "active_statuses": ["Active"],
+    },
+    "WA": {
+        "full_name": "license_printable_name",
+        "license_date": "original_issue_date",
+        "expiration_date": "expiration_date",
+        "date_format": "%Y-%m-%d",
+        "location": "state",
+        "location_format": "state",
+        "status": "status",
+        "active_statuses": ["Active"],
+    },
+    "OK": {
+        "first_name": "FirstName",
+        "middle_name": "MiddleName",
+        "last_name": "LastName",
+        "license_date": "OriginalLicenseDate",
+        "expiration_date": "LicenseExpirationDate",
+        "date_format": "%Y-%m-%dT%H:%M:%S",
+        "location": "State",
+        "location_format": "state",
+        "status": "LicenseStatusTypeName",
+        "active_statuses": ["Active"],
+    },
+    "OR": {
+        "first_name": "First Name",
+        "last_name": "Last Name",
+        "license_date": "License Date",
+        "expiration_date": "Expiration Date",
+        "date_format": "%m/%d/%Y",
+        "location": "State",
+        "location_format": "state",
+        "status": "Status",
+        "active_statuses": ["Active"],
+    },
+    "AK": {
+        "full_name": "Owners",
+        "license_date": "DateIssued",
+        "expiration_date": "DateExpired",
+        "date_format": "M/D/YYYY",
+        "location": "STATE",
+        "location_format": "state",
+        "status": "Status",
+        "active_statuses": ["Active"],
+    },
+}
+
+# Schema fields naming a column of the export
+schema_column_fields = [
+    "first_name",
+    "middle_name",
+    "last_name",
+    "suffix",
+    "full_name",
+    "license_date",
+    "location",
+    "expiration_date",
+    "status",
+]
+
+# How a location column gives the origin state: "state" cells hold a state
+# code or a name looked up in state_mapping, the others hold an address the
+# pattern finds the state code in
+location_formats = {
+    "state": None,
+    "city_state_zip": re.compile(r",\s*([A-Z]{2})\s"),
+}
+
+# Codes of the states, DC and the territories; validate_dataset reports any
+# other origin state
+state_codes = set(
+    "AK AL AR AZ CA CO CT DC DE FL GA HI IA ID IL IN KS KY LA MA MD ME MI MN MO "
+    "MS MT NC ND NE NH NJ NM NV NY OH OK OR PA RI SC SD TN TX UT VA VT WA WI WV "
+    "WY AS GU MP PR VI".split()
+)
+
+# Columns of the error tables of validate_dataset, and the schema fields
+# whose export columns it checks
+quality_columns = ["state", "row", "column", "reason", "value"]
+quality_fields = [
+    "first_name",
+    "last_name",
+    "full_name",
+    "license_date",
+    "expiration_date",
+    "location",
+]
+
+# Common nicknames and the given name they are short for, so fuzzy linkage
+# compares BOB with ROBERT as the same first name
+nicknames = {
+    "ANDY": "ANDREW",
+    "BEN": "BENJAMIN",
+    "BETH": "ELIZABETH",
+    "BILL": "WILLIAM",
+    "BILLY": "WILLIAM",
+    "BOB": "ROBERT",
+    "BOBBY": "ROBERT",
+    "CHARLIE": "CHARLES",
+    "CHUCK": "CHARLES",
+    "DAN": "DANIEL",
+    "DANNY": "DANIEL",
+    "DAVE": "DAVID",
+    "DICK": "RICHARD",
+    "DOUG": "DOUGLAS",
+    "ED": "EDWARD",
+    "FRED": "FREDERICK",
+    "GREG": "GREGORY",
+    "JEFF": "JEFFREY",
+    "JERRY": "GERALD",
+    "JIM": "JAMES",
+    "JIMMY": "JAMES",
+    "JOE": "JOSEPH",
+    "JOHNNY": "JOHN",
+    "KATE": "KATHERINE",
+    "KATHY": "KATHERINE",
+    "KEN": "KENNETH",
+    "LARRY": "LAWRENCE",
+    "LIZ": "ELIZABETH",
+    "MATT": "MATTHEW",
+    "MIKE": "MICHAEL",
+    "NICK": "NICHOLAS",
+    "PAT": "PATRICK",
+    "PETE": "PETER",
+    "RICH": "RICHARD",
+    "RICK": "RICHARD",
+    "ROB": "ROBERT",
+    "SAM": "SAMUEL",
+    "STEVE": "STEVEN",
+    "SUE": "SUSAN",
+    "TOM": "THOMAS",
+    "TOMMY": "THOMAS",
+    "TONY": "ANTHONY",
+    "WILL": "WILLIAM",
+}
+
+soundex_codes = {
+    **dict.fromkeys("BFPV", "1"),
+    **dict.fromkeys("CGJKQSXZ", "2"),
+    **dict.fromkeys("DT", "3"),
+    "L": "4",
+    **dict.fromkeys("MN", "5"),
+    "R": "6",
+}
+
+# Bump whenever standardize_dataset or its helpers change their output, so
+# cached and stored standardized datasets are rebuilt
+standardization_version = 2
+
+# Names are held as pyarrow backed strings when pyarrow is installed
+try:
+    import pyarrow  # noqa: F401
+
+    name_dtype = pd.StringDtype("pyarrow")
+except ImportError:
+    name_dtype = pd.StringDtype("python")
+
+# Compact in-memory dtypes of standardized records and of master rows
+standardized_dtypes = {
+    "first_name": name_dtype,
+    "middle_name": name_dtype,
+    "last_name": name_dtype,
+    "suffix": name_dtype,
+    "source_state": "category",
+    "license_date": "datetime64[ns]",
+    "origin_state": "category",
+    "license_active": "bool",
+    "expiration_date": "datetime64[ns]",
+}
+master_dtypes = {
+    "name_hash": name_dtype,
+    "license_state": "category",
+    "first_name": name_dtype,
+    "middle_name": name_dtype,
+    "last_name": name_dtype,
+    "match_confidence": "category",
+    "license_date": "datetime64[ns]",
+    "origin_state": "category",
+    "license_expiration_date": "datetime64[ns]",
+}
+
 
 def generate_name_hash(first_name, last_name, suffix="", origin_state=""):
     """
@@ -56,68 +340,308 @@ def generate_name_hash(first_name, last_name, suffix="", origin_state=""):
     return hashlib.sha256(name_string.encode()).hexdigest()[:16]
 
 
-def standardize_date(date_str, state):
+def generate_name_hashes(first_names, last_names, suffixes=None, origin_states=None):
     """
-    Convert each state date formats to datetime object or None
+    Batch version of generate_name_hash over arrays of name parts, with
+    missing parts hashed as "". Each distinct name key is built and hashed
+    once and the hashes are mapped back onto every position.
+    """
+    if len(first_names) == 0:
+        return np.array([], dtype=object)
+
+    parts = [
+        (
+            pd.Series(values, dtype=object).fillna("")
+            if values is not None
+            else pd.Series("", index=range(len(first_names)), dtype=object)
+        )
+        for values in [first_names, last_names, suffixes, origin_states]
+    ]
+    codes, keys = pd.MultiIndex.from_arrays(parts).factorize()
+
+    # Python's strip and upper, as pyarrow's differ on some characters
+    name_strings = keys.get_level_values(0).map(lambda part: part.strip().upper())
+    for level in range(1, 4):
+        name_strings = (
+            name_strings
+            + "|"
+            + keys.get_level_values(level).map(lambda part: part.strip().upper())
+        )
+    hashes = np.array(
+        [
+            hashlib.sha256(name_string.encode()).hexdigest()[:16]
+            for name_string in name_strings
+        ],
+        dtype=object,
+    )
+    return hashes[codes]
+
+
+def parse_month_day_year(date_str):
+    """
+    Parse an M/D/YYYY date; months and days are not always zero padded
     """
+    month, day, year = date_str.split("/")
+    formattedDate = f"{year}-{month:0>2}-{day:0>2}"
+    return datetime.strptime(formattedDate, "%Y-%m-%d")
 
-    if pd.isna(date_str):
+
+def parse_month_day_short_year(date_str):
+    """
+    Parse an M/D/YY date, which may also have a four digit year.
+    Two digit years up to 24 are 20YY, the rest 19YY.
+    """
+    month, day, year = date_str.split("/")
+    yearNum = int(year)
+    if yearNum <= 100:
+        if yearNum <= 24:
+            yearNum += 2000
+        else:
+            yearNum += 1900
+    formattedDate = f"{str(yearNum)}-{month:0>2}-{day:0>2}"
+    return datetime.strptime(formattedDate, "%Y-%m-%d")
+
+
+# Cells the scalar parsers can read have a digit in every part of the date;
+# see date_formats
+slash_date_shape = r"^[^/]*\d[^/]*/[^/]*\d[^/]*/[^/]*\d[^/]*\Z"
+dash_date_shape = r"^\d{4}-[^-]*\d[^-]*-[^-]*\d[^-]*"
+
+# Date formats of the exports: the pattern parse_date_column parses
+# dates with, and the scalar parser for dates the pattern does not match.
+# Formats without a parser are strptime formats. Patterns end in \Z, as $
+# also matches before a trailing newline, which the scalar parsers reject.
+# The shape is a looser pattern every date the scalar parser reads matches
+# (strptime also takes single digit times and Unicode digits), so other
+# cells are known not to be dates without parsing them one by one.
+date_formats = {
+    "M/D/YYYY": {
+        "pattern": r"^(?P<month>[0-9]{1,2})/(?P<day>[0-9]{1,2})/(?P<year>[0-9]{4})\Z",
+        "shape": slash_date_shape,
+        "parse": parse_month_day_year,
+    },
+    "M/D/YY": {
+        "pattern": r"^(?P<month>[0-9]{1,2})/(?P<day>[0-9]{1,2})/(?P<year>[0-9]+)\Z",
+        "shape": slash_date_shape,
+        "parse": parse_month_day_short_year,
+        "short_years": True,
+    },
+    "%Y-%m-%d": {
+        "pattern": r"^(?P<year>[0-9]{4})-(?P<month>[0-9]{1,2})-(?P<day>[0-9]{1,2})\Z",
+        "shape": dash_date_shape + r"\Z",
+    },
+    "%Y-%m-%dT%H:%M:%S": {
+        "pattern": (
+            r"^(?P<year>[0-9]{4})-(?P<month>[0-9]{1,2})-(?P<day>[0-9]{1,2})"
+            r"T(?P<hour>[0-9]{2}):(?P<minute>[0-9]{2}):(?P<second>[0-9]{2})\Z"
+        ),
+        # strptime matches the T in any case
+        "shape": dash_date_shape + r"[Tt][^:]*\d[^:]*:[^:]*\d[^:]*:[^:]*\d[^:]*\Z",
+    },
+    "%m/%d/%Y": {
+        "pattern": r"^(?P<month>[0-9]{1,2})/(?P<day>[0-9]{1,2})/(?P<year>[0-9]{4})\Z",
+        "shape": slash_date_shape,
+    },
+}
+
+
+def parse_date(date_str, date_format):
+    """
+    Convert a date in one of date_formats to a datetime object or None
+    """
+    if pd.isna(date_str) or date_format is None:
         return None
 
     try:
-        if state in ["IL", "AK", "HI"]:
-            month, day, year = date_str.split("/")
-            formattedDate = f"{year}-{month:0>2}-{day:0>2}"
-            return datetime.strptime(formattedDate, "%Y-%m-%d")
-        elif state in ["CA"]:
-            month, day, year = date_str.split("/")
-            yearNum = int(year)
-            if yearNum <= 100:
-                if yearNum <= 24:
-                    yearNum += 2000
-                else:
-                    yearNum += 1900
-            formattedDate = f"{str(yearNum)}-{month:0>2}-{day:0>2}"
-            return datetime.strptime(formattedDate, "%Y-%m-%d")
-        elif state in ["GA", "UT", "WA"]:
-            return datetime.strptime(date_str, "%Y-%m-%d")
-        elif state in ["OK"]:
-            return datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%S")
-        elif state in ["OR"]:
-            return datetime.strptime(date_str, "%m/%d/%Y")
-
-    except Exception as e:
-        print(e)
+        parse = date_formats[date_format].get("parse")
+        if parse is None:
+            return datetime.strptime(date_str, date_format)
+        return parse(date_str)
+
+    except Exception:
+        # Dates that cannot be parsed are reported by validate_dataset
         return None
 
-    return None
 
+def standardize_date(date_str, state):
+    """
+    Convert each state date formats to datetime object or None
+    """
+    return parse_date(date_str, state_schemas.get(state, {}).get("date_format"))
 
-def standardize_state(location_str, state):
+
+def string_values(series):
     """
-    Convert each location to a state abbreviation (if it exists)
+    Keep only the str cells of a column so .str methods can be used on it
     """
+    series = series.astype(object)
+    return series.where(series.map(type) == str)
 
-    if pd.isna(location_str):
+
+def date_shaped(date_series, date_format):
+    """
+    Which cells of a column have the shape of date_format, see date_formats
+    """
+    shape = date_formats[date_format]["shape"]
+    return string_values(date_series).str.contains(shape, na=False).to_numpy()
+
+
+def parse_date_column(date_series, date_format):
+    """
+    Vectorized parse_date for a whole column.
+    Dates in the expected layout are assembled from their numeric parts.
+    Only cells outside it that still have the shape of a date fall back to
+    parse_date, so the result is identical, and cells that are not dates
+    at all never reach the exception handling of the scalar parsers.
+    """
+    if date_format is None:
+        return pd.Series(None, index=date_series.index, dtype=object)
+    pattern = date_formats[date_format]["pattern"]
+
+    fields = string_values(date_series).str.extract(pattern).astype(float)
+    matched = fields["year"].notna().to_numpy()
+    if date_formats[date_format].get("short_years"):
+        years = fields["year"]
+        fields["year"] = years + np.where(
+            years <= 100, np.where(years <= 24, 2000, 1900), 0
+        )
+
+    # pd.to_datetime rolls over out of range parts (e.g. 60 seconds), so only
+    # keep dates whose parts survive the round trip unchanged. Years out of
+    # range and missing times are masked first, as they overflow its
+    # nanosecond arithmetic; a missing year still gives NaT.
+    valid = fields["year"].between(1000, 9999)
+    times = {part: 0 for part in ["hour", "minute", "second"] if part in fields}
+    dates = pd.to_datetime(fields.where(valid).fillna(times), errors="coerce")
+    for part in fields.columns:
+        valid &= getattr(dates.dt, part) == fields[part]
+    dates = dates.where(valid)
+
+    # Dates in the layout the round trip rejected are invalid under the scalar
+    # rules too, or before the year 1000, which no datetime64[ns] holds
+    # either; other cells shaped like a date go through the scalar rules
+    leftover = dates.isna().to_numpy() & ~matched
+    if leftover.any():
+        leftover[leftover] = date_shaped(date_series[leftover], date_format)
+    if leftover.any():
+        fallback = date_series[leftover].apply(parse_date, args=(date_format,))
+        if fallback.notna().any():
+            dates = dates.astype(object).where(dates.notna(), None)
+            dates[leftover] = fallback.to_numpy(dtype=object)
+            return dates.infer_objects()
+
+    if dates.isna().all():
+        return pd.Series(None, index=date_series.index, dtype=object)
+    return dates
+
+
+def parse_location(location_str, location_format):
+    """
+    Convert a location in one of location_formats to a state abbreviation
+    (if it exists)
+    """
+
+    if pd.isna(location_str) or location_format is None:
         return None
 
     try:
-        if state in ["AK", "CA", "NV", "OK", "OR", "UT", "WA", "IL"]:
+        pattern = location_formats[location_format]
+        if pattern is None:
             if location_str in state_mapping:
                 return state_mapping[location_str]
             return location_str
-        elif state in ["GA"]:
-            pattern = r",\s*([A-Z]{2})\s"
-            match = re.search(pattern, location_str)
-            if match:
-                state = match.group(1)
-                return state
-
-    except Exception as e:
-        print(e)
+        match = pattern.search(location_str)
+        if match:
+            return match.group(1)
+
+    except Exception:
+        # Locations without a state code are reported by validate_dataset
         return None
 
 
+def standardize_state(location_str, state):
+    """
+    Convert each location to a state abbreviation (if it exists)
+    """
+    return parse_location(
+        location_str, state_schemas.get(state, {}).get("location_format")
+    )
+
+
+def parse_location_column(location_series, location_format):
+    """
+    Vectorized parse_location for a whole column
+    """
+    if location_format is None:
+        return pd.Series(None, index=location_series.index, dtype=object)
+
+    pattern = location_formats[location_format]
+    if pattern is None:
+        mapped = location_series.isin(list(state_mapping))
+        locations = location_series.where(
+            ~mapped, location_series.map(state_mapping)
+        ).astype(object)
+    else:
+        locations = (
+            string_values(location_series)
+            .str.extract(pattern, expand=False)
+            .astype(object)
+        )
+
+    return locations.where(locations.notna(), None)
+
+
+# Name patterns, compiled once
+name_title_pattern = re.compile(r"^(MR|MRS|MS|DR|MISS|M/S|M/M)\.?\s+", re.IGNORECASE)
+# Keep periods for suffixes like "JR."
+name_punctuation_pattern = re.compile(r"[^\w\s\.]")
+name_suffix_pattern = re.compile(r"\b(JR|SR|I{2,3}|IV|V|ESQ)\.?$")
+full_name_suffix_pattern = re.compile(
+    r"^(?P<rest>.*\S) \.*(?P<suffix>JR|SR|I{2,3}|IV|V|ESQ)\.*$"
+)
+full_name_parts_pattern = re.compile(
+    r"^(?P<first_name>\S+)(?:(?: (?P<middle_name>.+?))? (?P<last_name>\S+))?$"
+)
+
+# Distinct raw names kept by each name cache
+name_cache_size = 1 << 18
+
+
+class NameCache:
+    """
+    Bounded cache of results per distinct name. Once it holds more than
+    max_size names the ones cached first are evicted.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.entries = {}
+
+    def lookup(self, names, compute):
+        """
+        Results for a list of names. Names not in the cache are computed in
+        one batch by compute, which takes and returns a list.
+        """
+        entries = self.entries
+        results = list(map(entries.get, names))
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            computed = compute([names[i] for i in missing])
+            for i, result in zip(missing, computed):
+                results[i] = entries[names[i]] = result
+            # Dicts keep insertion order, so the first keys are the oldest
+            for name in list(islice(entries, max(len(entries) - self.max_size, 0))):
+                # Another thread may have evicted it first
+                entries.pop(name, None)
+        return results
+
+
+# Exports of every state repeat the same first names, middle names and
+# suffixes, and chunked reads repeat them chunk after chunk
+cleaned_names = NameCache(name_cache_size)
+extracted_name_parts = NameCache(name_cache_size)
+
+
 def clean_name(name):
     """
     Clean and standardize name string:
@@ -133,16 +657,35 @@ def clean_name(name):
     # gender_from_title = extract_gender_from_title(name)
 
     # Remove titles
-    titles = r"^(MR|MRS|MS|DR|MISS|M/S|M/M)\.?\s+"
-    name = re.sub(titles, "", str(name).upper(), flags=re.IGNORECASE)
+    name = name_title_pattern.sub("", str(name).upper())
 
     # Remove extra spaces and standardize special characters
-    name = re.sub(r"[^\w\s\.]", " ", name)  # Keep periods for suffixes like "JR."
+    name = name_punctuation_pattern.sub(" ", name)
     name = " ".join(name.split())
 
     return name
 
 
+def clean_names(names):
+    """
+    clean_name for a list of names
+    """
+    return [clean_name(name) for name in names]
+
+
+def clean_name_column(name_series):
+    """
+    Vectorized clean_name for a whole column.
+    Each distinct name is cleaned once, through the cleaned_names cache, and
+    broadcast back to the rows holding it.
+    """
+    codes, uniques = pd.factorize(name_series)
+    cleaned = cleaned_names.lookup(list(uniques), clean_names)
+    # Missing names have code -1, which picks the trailing ""
+    cleaned = np.array(cleaned + [""], dtype=object)
+    return pd.Series(cleaned[codes], index=name_series.index, dtype=object)
+
+
 def extract_name_parts(name):
     """
     Extract first, middle, last names, and suffix from a full name string.
@@ -151,9 +694,6 @@ def extract_name_parts(name):
     if pd.isna(name):
         return ("", "", "", "")
 
-    # List of common suffixes
-    suffixes = r"\b(JR|SR|I{2,3}|IV|V|ESQ)\.?$"
-
     # Split the name into parts
     parts = name.split()
     if not parts:
@@ -163,7 +703,7 @@ def extract_name_parts(name):
     suffix = ""
     if len(parts) > 1:
         last_part = parts[-1].strip(".")
-        if re.match(suffixes, last_part):
+        if name_suffix_pattern.match(last_part):
             suffix = last_part
             parts = parts[:-1]
 
@@ -175,470 +715,1885 @@ def extract_name_parts(name):
         return (parts[0], " ".join(parts[1:-1]), parts[-1], suffix)
 
 
-def standardize_dataset(df, state):
+def extract_names_parts(names):
     """
-    Standardize names from different state datasets into common format
+    Split a list of cleaned names into (first_name, middle_name, last_name,
+    suffix) tuples
     """
-    df = df.copy()
+    results = []
+    for name in names:
+        suffixed = full_name_suffix_pattern.match(name)
+        rest, suffix = suffixed.groups() if suffixed else (name, "")
+        parts = full_name_parts_pattern.match(rest)
+        if parts:
+            first_name, middle_name, last_name = parts.groups(default="")
+        else:
+            first_name = middle_name = last_name = ""
+        results.append((first_name, middle_name, last_name, suffix))
+    return results
 
-    if state == "IL":
-        df["first_name"] = df["First Name"].apply(clean_name)
-        df["middle_name"] = df["Middle"].apply(clean_name)
-        df["last_name"] = df["Last Name"].apply(clean_name)
-        df["suffix"] = df["Suffix"].apply(clean_name)
-        df["license_date"] = df["Original Issue Date"].apply(
-            standardize_date, args=(state,)
-        )
-        df["origin_state"] = df["State"].apply(standardize_state, args=(state,))
-        df["expiration_date"] = df["Expiration Date"].apply(
-            standardize_date, args=(state,)
-        )
-        df["license_active"] = df["License Status"] == "ACTIVE"
 
-    elif state == "CA":
-        # CA has separate name fields, check first name for title
-        df["first_name"] = df["First Name"].apply(clean_name)
-        df["middle_name"] = df["Middle Name"].apply(clean_name)
-        df["last_name"] = df["Org/Last Name"].apply(clean_name)
-        df["suffix"] = ""
-        df["license_date"] = df["Original Issue Date"].apply(
-            standardize_date, args=(state,)
-        )
-        df["origin_state"] = df["State"].apply(standardize_state, args=(state,))
-        df["expiration_date"] = df["Expiration Date"].apply(
-            standardize_date, args=(state,)
-        )
-        df["license_active"] = df["License Status"] == "Active"
+def extract_name_parts_column(name_series):
+    """
+    Vectorized extract_name_parts for a column of cleaned names.
+    Each distinct name is split once, through the extracted_name_parts cache.
+    Returns a DataFrame of first_name, middle_name, last_name and suffix.
+    """
+    codes, uniques = pd.factorize(name_series)
+    parts = extracted_name_parts.lookup(list(uniques), extract_names_parts)
+    parts = np.array(parts + [("", "", "", "")], dtype=object).reshape(-1, 4)
+    return pd.DataFrame(
+        parts[codes],
+        index=name_series.index,
+        columns=["first_name", "middle_name", "last_name", "suffix"],
+    )
 
-    elif state == "GA":
-        df["full_name_cleaned"] = df["fullName"].apply(clean_name)
-        df[["first_name", "middle_name", "last_name", "suffix"]] = (
-            df["full_name_cleaned"].apply(extract_name_parts).apply(pd.Series)
-        )
-        df["license_date"] = df["issueDate"].apply(standardize_date, args=(state,))
-        df["origin_state"] = df["location"].apply(standardize_state, args=(state,))
-        df["expiration_date"] = df["expirationDate"].apply(
-            standardize_date, args=(state,)
-        )
-        df["license_active"] = df["licenseStatus"].isin(
-            ["Active", "Active-Renewal Pending"]
-        )
 
-    elif state == "NV":
-        df["full_name_cleaned"] = df["full_name"].apply(clean_name)
-        df[["first_name", "middle_name", "last_name", "suffix"]] = (
-            df["full_name_cleaned"].apply(extract_name_parts).apply(pd.Series)
-        )
-        df["license_date"] = None
-        df["origin_state"] = df["state"].apply(standardize_state, args=(state,))
-        df["license_active"] = df["status"] == "ACTIVE"
-        df["expiration_date"] = df["expiration_date"].apply(
-            standardize_date, args=(state,)
-        )
+def compile_state_schema(state, schema):
+    """
+    Turn a state schema into a function standardizing that state's export.
+    The schema is checked and its columns and formats looked up once, so the
+    function is a fixed sequence of whole-column transforms.
+    """
+    if "full_name" not in schema and not (
+        schema.get("first_name") and schema.get("last_name")
+    ):
+        raise ValueError(f"{state} schema needs full_name or first and last names")
+    for field in ["status", "active_statuses"]:
+        if not schema.get(field):
+            raise ValueError(f"{state} schema has no {field}")
+    date_format = schema.get("date_format")
+    if date_format is not None and date_format not in date_formats:
+        raise ValueError(f"{state} schema has unknown date format {date_format}")
+    location_format = schema.get("location_format") if schema.get("location") else None
+    if schema.get("location") and location_format not in location_formats:
+        raise ValueError(f"{state} schema has unknown location format")
+
+    name_parts = ["first_name", "middle_name", "last_name", "suffix"]
+    full_name_column = schema.get("full_name")
+    name_columns = {part: schema.get(part) for part in name_parts}
+    date_columns = {
+        field: schema.get(field) for field in ["license_date", "expiration_date"]
+    }
+    location_column = schema.get("location")
+    status_column = schema["status"]
+    active_statuses = list(schema["active_statuses"])
+
+    def standardize(df):
+        # The result is built as a new frame so the raw export is never copied
+        standardized = pd.DataFrame(index=df.index)
+
+        if full_name_column:
+            standardized["full_name_cleaned"] = clean_name_column(df[full_name_column])
+            standardized[name_parts] = extract_name_parts_column(
+                standardized["full_name_cleaned"]
+            )
+        else:
+            for part, column in name_columns.items():
+                standardized[part] = clean_name_column(df[column]) if column else ""
+
+        for field, column in date_columns.items():
+            if column:
+                standardized[field] = parse_date_column(df[column], date_format)
+            else:
+                standardized[field] = None
+
+        if location_column:
+            standardized["origin_state"] = parse_location_column(
+                df[location_column], location_format
+            )
+        else:
+            standardized["origin_state"] = None
+        standardized["license_active"] = df[status_column].isin(active_statuses)
 
-    elif state == "HI":
-        df["full_name_cleaned"] = df["full_name"].apply(clean_name)
-        df[["first_name", "middle_name", "last_name", "suffix"]] = (
-            df["full_name_cleaned"].apply(extract_name_parts).apply(pd.Series)
-        )
-        df["license_date"] = df["original_license_date"].apply(
-            standardize_date, args=(state,)
-        )
-        df["origin_state"] = None
-        df["license_active"] = df["status"] == "Current, Valid & In Good Standing"
-        df["expiration_date"] = df["expiration_date"].apply(
-            standardize_date, args=(state,)
-        )
+        # Add state identifier
+        standardized["source_state"] = state
 
-    elif state == "UT":
-        df["full_name_cleaned"] = df["FULL NAME"].apply(clean_name)
-        df[["first_name", "middle_name", "last_name", "suffix"]] = (
-            df["full_name_cleaned"].apply(extract_name_parts).apply(pd.Series)
-        )
-        df["license_date"] = df["ISSUE DATE"].apply(standardize_date, args=(state,))
-        df["origin_state"] = df["STATE"].apply(standardize_state, args=(state,))
-        df["expiration_date"] = df["EXPIRATION DATE"].apply(
-            standardize_date, args=(state,)
-        )
-        df["license_active"] = df["LICENSE STATUS"] == "Active"
+        # Select only needed columns
+        return compact_license_records(standardized[list(standardized_dtypes)])
 
-    elif state == "WA":
-        df["full_name_cleaned"] = df["license_printable_name"].apply(clean_name)
-        df[["first_name", "middle_name", "last_name", "suffix"]] = (
-            df["full_name_cleaned"].apply(extract_name_parts).apply(pd.Series)
-        )
-        df["license_date"] = df["original_issue_date"].apply(
-            standardize_date, args=(state,)
-        )
-        df["origin_state"] = df["state"].apply(standardize_state, args=(state,))
-        df["expiration_date"] = df["expiration_date"].apply(
-            standardize_date, args=(state,)
-        )
-        df["license_active"] = df["status"] == "Active"
-
-    elif state == "OK":
-        df["first_name"] = df["FirstName"].apply(clean_name)
-        df["middle_name"] = df["MiddleName"].apply(clean_name)
-        df["last_name"] = df["LastName"].apply(clean_name)
-        df["suffix"] = ""
-        df["license_date"] = df["OriginalLicenseDate"].apply(
-            standardize_date, args=(state,)
-        )
-        df["origin_state"] = df["State"].apply(standardize_state, args=(state,))
-        df["expiration_date"] = df["LicenseExpirationDate"].apply(
-            standardize_date, args=(state,)
+    return standardize
+
+
+# Compiled state schemas by state, see standardize_dataset
+compiled_state_schemas = {}
+
+
+def standardize_dataset(df, state):
+    """
+    Standardize names from different state datasets into common format,
+    following the state's schema in state_schemas
+    """
+    if state not in state_schemas:
+        raise KeyError(f"No schema for state {state}")
+    standardize = compiled_state_schemas.get(state)
+    if standardize is None:
+        standardize = compiled_state_schemas[state] = compile_state_schema(
+            state, state_schemas[state]
         )
-        df["license_active"] = df["LicenseStatusTypeName"] == "Active"
-
-    elif state == "OR":
-        df["first_name"] = df["First Name"].apply(clean_name)
-        df["middle_name"] = ""
-        df["last_name"] = df["Last Name"].apply(clean_name)
-        df["suffix"] = ""
-        df["license_date"] = df["License Date"].apply(standardize_date, args=(state,))
-        df["origin_state"] = df["State"].apply(standardize_state, args=(state,))
-        df["expiration_date"] = df["Expiration Date"].apply(
-            standardize_date, args=(state,)
+    return standardize(df)
+
+
+def validate_dataset(df, standardized, state, first_row=0):
+    """
+    Data quality failures of a standardized state export, checked column by
+    column against its raw export df:
+    unparseable_date: a date the export has that could not be parsed
+    unknown_location: a location that gave no state or territory code
+    empty_name: a record left without a first or last name
+    Returns an error table with one row per failing cell: the position of
+    the record in the export (chunks start at first_row), the export column,
+    the reason code and the raw value.
+    """
+    schema = state_schemas[state]
+    tables = []
+
+    def present(column):
+        values = df[column]
+        return (values.notna() & (values.astype(str).str.strip() != "")).to_numpy()
+
+    def report_failures(failed, column, reason):
+        if failed.any():
+            values = df[column].to_numpy(dtype=object)[failed]
+            tables.append(
+                pd.DataFrame(
+                    {
+                        "row": first_row + np.flatnonzero(failed),
+                        "column": column,
+                        "reason": reason,
+                        "value": np.where(pd.isna(values), None, values),
+                    }
+                )
+            )
+
+    if schema.get("date_format"):
+        for field in ["license_date", "expiration_date"]:
+            column = schema.get(field)
+            if column:
+                unparsed = standardized[field].isna().to_numpy()
+                report_failures(present(column) & unparsed, column, "unparseable_date")
+
+    if schema.get("location"):
+        unknown = ~standardized["origin_state"].isin(state_codes).to_numpy()
+        report_failures(
+            present(schema["location"]) & unknown,
+            schema["location"],
+            "unknown_location",
         )
-        df["license_active"] = df["Status"] == "Active"
 
-    elif state == "AK":
-        df["full_name_cleaned"] = df["Owners"].apply(clean_name)
-        df[["first_name", "middle_name", "last_name", "suffix"]] = (
-            df["full_name_cleaned"].apply(extract_name_parts).apply(pd.Series)
+    for part in ["first_name", "last_name"]:
+        column = schema.get(part) or schema["full_name"]
+        report_failures(
+            (standardized[part] == "").to_numpy(dtype=bool), column, "empty_name"
         )
-        df["license_date"] = df["DateIssued"].apply(standardize_date, args=(state,))
-        df["origin_state"] = df["STATE"].apply(standardize_state, args=(state,))
-        df["expiration_date"] = df["DateExpired"].apply(standardize_date, args=(state,))
-        df["license_active"] = df["Status"] == "Active"
 
-    # Add state identifier
-    df["source_state"] = state
+    if not tables:
+        return pd.DataFrame(columns=quality_columns)
+    errors = pd.concat(tables, ignore_index=True).assign(state=state)
+    return errors.sort_values("row", kind="stable", ignore_index=True)[quality_columns]
 
-    # Select only needed columns
-    return df[
-        [
-            "first_name",
-            "middle_name",
-            "last_name",
-            "suffix",
-            "source_state",
-            "license_date",
-            "origin_state",
-            "license_active",
-            "expiration_date",
-        ]
-    ]
+
+def quality_summary(errors):
+    """
+    Failures per state and reason code of a list of error tables
+    """
+    errors = [table for table in errors if len(table)]
+    if not errors:
+        return {}
+    counts = pd.concat(errors)[["state", "reason"]].value_counts().sort_index()
+    summary = {}
+    for (state, reason), count in counts.items():
+        summary.setdefault(state, {})[reason] = int(count)
+    return summary
 
 
-def determine_origin_state(group_df):
+def export_columns(state):
     """
-    Determine the consensus origin state for a group of records.
-    Returns the origin state if there's consensus, None if conflicting.
+    Columns of a state export its schema reads
     """
-    # Get all non-null origin states
-    origin_states = group_df[
-        group_df["origin_state"].notna() & (group_df["origin_state"] != "")
-    ]["origin_state"].unique()
+    schema = state_schemas[state]
+    return [schema[field] for field in schema_column_fields if schema.get(field)]
 
-    if len(origin_states) == 0:
-        # No origin state information available
-        return None
-    elif len(origin_states) == 1:
-        # Consensus - all records agree on origin state
-        return origin_states[0]
-    else:
-        # Conflict - different origin states found
-        return "CONFLICT"
+
+def compact_license_records(df):
+    """
+    Convert standardized records to their compact dtypes: pyarrow strings for
+    names, categoricals for states and datetime64 with NaT for dates
+    """
+    names = ["first_name", "middle_name", "last_name", "suffix"]
+    df = df.assign(
+        **{column: df[column].fillna("") for column in names if df[column].hasnans}
+    )
+    # Locations can pass through as numbers from JSON exports; state
+    # categories have to be strings to sort
+    for column in ["source_state", "origin_state"]:
+        states = df[column]
+        if (
+            states.dtype == object
+            and pd.api.types.infer_dtype(states, skipna=True) != "string"
+        ):
+            df = df.assign(**{column: states.map(str, na_action="ignore")})
+    for column in ["license_date", "expiration_date"]:
+        if df[column].dtype != standardized_dtypes[column]:
+            df = df.assign(**{column: nanosecond_dates(df[column])})
+    return df.astype(
+        {
+            column: dtype
+            for column, dtype in standardized_dtypes.items()
+            if df[column].dtype != dtype
+        }
+    )
 
 
-def process_middle_names_and_states(group_df):
+def nanosecond_dates(dates):
     """
-    Process a group of names to find compatible middle names and determine match confidence.
-    Also checks for origin state conflicts.
-    Returns information about the match including confidence level.
+    Dates as datetime64[ns], NaT where a date falls outside the years it can
+    hold (1677 to 2262), so validate_dataset reports it as unparseable
     """
-    # Check origin state first - if there's a conflict, split into separate groups
-    consensus_origin = determine_origin_state(group_df)
+    if not pd.api.types.is_datetime64_dtype(dates):
+        dates = pd.to_datetime(dates, errors="coerce")
+    in_range = (dates >= pd.Timestamp.min) & (dates <= pd.Timestamp.max)
+    return dates.where(in_range).astype("datetime64[ns]")
 
-    if consensus_origin == "CONFLICT":
-        # Split by origin state and process separately
-        results = []
-        for origin_state, origin_group in group_df.groupby("origin_state"):
-            if pd.isna(origin_state) or origin_state == "":
-                continue
-            result = process_middle_names_and_states_internal(
-                origin_group, origin_state
-            )
-            if result:
-                results.append(result)
-        return results if results else None
-    else:
-        # No conflict, process as one group
-        result = process_middle_names_and_states_internal(group_df, consensus_origin)
-        return [result] if result else None
-
-
-def process_middle_names_and_states_internal(group_df, consensus_origin):
-    """
-    Process a group of names to find compatible middle names and determine match confidence.
-    Returns information about the match including confidence level.
-    """
-    # Separate records with and without middle names
-    has_middle = group_df[
-        group_df["middle_name"].notna() & (group_df["middle_name"] != "")
-    ].copy()
-    no_middle = group_df[
-        group_df["middle_name"].isna() | (group_df["middle_name"] == "")
-    ].copy()
-
-    # Extract all middle names and their states
-    name_state_pairs = []
-    for _, row in has_middle.iterrows():
-        if pd.notna(row["middle_name"]) and row["middle_name"]:
-            for name in row["middle_name"].split(","):
-                name = name.strip()
-                if name:
-                    name_state_pairs.append((name, row["source_state"]))
-
-    # Separate full names and initials
-    full_names = [
-        (name, state)
-        for name, state in name_state_pairs
-        if len(name.replace(" ", "")) > 1
-    ]
-    initials = [
-        (name, state)
-        for name, state in name_state_pairs
-        if len(name.replace(" ", "")) == 1
+
+def compact_master_list(master_df):
+    """
+    Convert master rows to their compact dtypes, also after concatenating
+    lists whose categoricals differ
+    """
+    if master_df.empty:
+        return master_df
+    return master_df.astype(
+        {
+            column: dtype
+            for column, dtype in master_dtypes.items()
+            if master_df[column].dtype != dtype
+        }
+    )
+
+
+def compatible_middle_names(middle_names, unit_ids, unit_count):
+    """
+    Grouped middle name matching: full middle names are compatible, initials
+    only when a full middle name of the unit starts with them.
+    Returns the number of compatible middle names per unit and the
+    comma separated list of them.
+    """
+    tokens = (
+        pd.Series(middle_names, index=unit_ids, dtype=object)
+        .str.split(",")
+        .explode()
+        .str.strip()
+    )
+    tokens = tokens[tokens.notna() & (tokens != "")]
+
+    # Initials only count when they start one of the unit's full names
+    is_full = tokens.str.replace(" ", "").str.len() > 1
+    full_names = tokens[is_full]
+    initials = tokens[~is_full]
+    full_name_initials = pd.MultiIndex.from_arrays(
+        [full_names.index, full_names.str[0]]
+    )
+    initials = initials[
+        pd.MultiIndex.from_arrays([initials.index, initials]).isin(full_name_initials)
     ]
 
-    # Find compatible matches
-    compatible_pairs = []
-    compatible_pairs.extend(full_names)
+    compatible = pd.DataFrame(
+        {
+            "unit": np.concatenate([full_names.index, initials.index]),
+            "name": np.concatenate([full_names.to_numpy(), initials.to_numpy()]),
+        }
+    )
+    compatible = compatible.drop_duplicates().sort_values(["unit", "name"])
 
-    # Only add initials that match full names
-    for initial, state in initials:
-        if any(name.startswith(initial) for name, _ in full_names):
-            compatible_pairs.append((initial, state))
+    counts = np.bincount(compatible["unit"], minlength=unit_count)
+    joined = np.full(unit_count, "", dtype=object)
+    single = compatible[counts[compatible["unit"]] == 1]
+    joined[single["unit"]] = single["name"].to_numpy()
+    multiple = compatible[counts[compatible["unit"]] > 1]
+    if not multiple.empty:
+        multiple = multiple.groupby("unit")["name"].agg(", ".join)
+        joined[multiple.index] = multiple.to_numpy()
 
-    # Determine match confidence
-    if compatible_pairs:
-        compatible_pairs.sort(key=lambda x: (len(x[0]) == 1, x[0]))
-        compatible_names = sorted(set(name for name, _ in compatible_pairs))
-        compatible_states = sorted(set(state for _, state in compatible_pairs))
+    return counts, joined
 
-        if not no_middle.empty:
-            compatible_states = sorted(
-                set(compatible_states) | set(no_middle["source_state"])
-            )
 
-        if len(compatible_names) == 1:
-            confidence = "HIGH"
-        else:
-            confidence = "MEDIUM"
+def combine_license_records(dfs_dict):
+    """
+    Combine standardized datasets into one frame of license records with the
+    composite last name used as part of the name key
+    """
+    frames = [compact_license_records(df) for df in dfs_dict.values()]
+
+    # Every frame gets the same sorted state categories so they stay
+    # categorical through the concat; "" stands for a missing origin state
+    for column in ["source_state", "origin_state"]:
+        categories = {""}
+        for frame in frames:
+            categories.update(frame[column].dropna().unique())
+        dtype = pd.CategoricalDtype(sorted(categories))
+        frames = [frame.astype({column: dtype}) for frame in frames]
+
+    all_names = pd.concat(frames, ignore_index=True)
+    all_names["origin_state"] = all_names["origin_state"].fillna("")
+
+    suffix = all_names["suffix"]
+    all_names["last_name_with_suffix"] = (
+        (all_names["last_name"] + " " + suffix)
+        .where(suffix != "", all_names["last_name"])
+        .str.strip()
+    )
+    return all_names
 
-        middle_name_result = ", ".join(compatible_names)
-    elif len(group_df["source_state"].unique()) > 1:
-        confidence = "LOW"
-        middle_name_result = ""
-        compatible_states = sorted(group_df["source_state"].unique())
-    else:
-        # Single state, single record - singleton
-        return None
+
+def linkage_keys(all_names):
+    """
+    Factorize the name key, origin and source state of combined records and
+    sort the records once by name key.
+    """
+    first_codes, first_names = pd.factorize(all_names["first_name"], sort=True)
+    last_codes, last_names = pd.factorize(all_names["last_name_with_suffix"], sort=True)
+    origin_codes, origins = pd.factorize(all_names["origin_state"], sort=True)
+    state_codes, states = pd.factorize(all_names["source_state"])
 
     return {
-        "middle_name": middle_name_result,
-        "states": compatible_states,
-        "confidence": confidence,
-        "origin_state": consensus_origin,
-        "group_df": group_df,
+        "first_codes": first_codes,
+        "first_names": first_names.to_numpy(),
+        "last_codes": last_codes,
+        "last_names": last_names.to_numpy(),
+        "origin_codes": origin_codes,
+        "origins": origins.to_numpy(),
+        "state_codes": state_codes,
+        "states": states.to_numpy(),
+        # lexsort is stable so records keep their order within a name
+        "order": np.lexsort((last_codes, first_codes)),
     }
 
 
-def create_master_license_list(dfs_dict):
+def link_master_license_list(dfs_dict):
     """
-    Create a master list where each record represents one license in one state.
-    All matched names get the same hash.
+    Link the records of all states into the master list, one row per license
+    with a shared name_hash for every matched person. Records are sorted once by name key and group boundaries are found with
+    NumPy, so the per group aggregates are grouped reductions and the master
+    rows are built as whole columns. tests/test_reference_linkage.py keeps the
+    group by group linkage it replaced as the reference for its output.
     """
-    # Combine all dataframes
-    all_names = pd.concat(dfs_dict.values(), ignore_index=True)
-    all_names = all_names.fillna("")
+    all_names = combine_license_records(dfs_dict)
+    if all_names.empty:
+        return pd.DataFrame()
 
-    # Create composite last name with suffix
-    all_names["last_name_with_suffix"] = all_names.apply(
-        lambda x: f"{x['last_name']} {x['suffix']}" if x["suffix"] else x["last_name"],
-        axis=1,
-    ).str.strip()
+    return link_license_records(all_names, linkage_keys(all_names))
 
-    # Store all license records
-    master_records = []
 
-    # Process each name group
-    for name_key, group in all_names.groupby(["first_name", "last_name_with_suffix"]):
-        first_name = name_key[0]
-        last_name = name_key[1]
+def link_master_license_lists(dfs_dict):
+    """
+    Build the "all" and "active" master lists from one set of standardized
+    datasets. The records are combined and sorted by name key once and the
+    active list links the license_active subset of that order.
+    """
+    all_names = combine_license_records(dfs_dict)
+    if all_names.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    keys = linkage_keys(all_names)
+    master_all = link_license_records(all_names, keys)
+    master_active = link_license_records(
+        all_names, keys, (all_names["license_active"] == True).to_numpy()
+    )
+    return master_all, master_active
+
 
-        # Process the group to find matches
-        match_results = process_middle_names_and_states(group)
+def link_license_records(all_names, keys, selected=None):
+    """
+    Link combined records into master rows, see link_master_license_list.
+    selected optionally restricts linkage to a boolean mask of records.
+    """
+    order = keys["order"]
+    if selected is not None:
+        order = order[selected[order]]
+        if len(order) == 0:
+            return pd.DataFrame()
+    first_names = keys["first_names"]
+    last_names = keys["last_names"]
+    origins = keys["origins"]
+    first_codes = keys["first_codes"][order]
+    last_codes = keys["last_codes"][order]
+    origin_codes = keys["origin_codes"][order]
+    state_codes = keys["state_codes"]
+    states = keys["states"]
+
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = (first_codes[1:] != first_codes[:-1]) | (
+        last_codes[1:] != last_codes[:-1]
+    )
+    group_ids = np.cumsum(new_group) - 1
+    group_count = group_ids[-1] + 1
+
+    # Groups that disagree on origin state are split into one unit per origin,
+    # and their records without an origin state are left out. Reordering only
+    # moves records within a group, so group_ids and new_group still hold.
+    has_origin = origins[origin_codes] != ""
+    group_origins = np.unique(
+        group_ids[has_origin] * len(origins) + origin_codes[has_origin]
+    )
+    conflict = (
+        np.bincount(group_origins // len(origins), minlength=group_count)[group_ids] > 1
+    )
+    by_origin = np.lexsort((np.where(conflict, origin_codes, -1), group_ids))
+    order = order[by_origin]
+    first_codes = first_codes[by_origin]
+    last_codes = last_codes[by_origin]
+    origin_codes = origin_codes[by_origin]
+    has_origin = has_origin[by_origin]
+    conflict = conflict[by_origin]
+
+    new_unit = new_group.copy()
+    new_unit[1:] |= conflict[1:] & (origin_codes[1:] != origin_codes[:-1])
+    unit_ids = np.cumsum(new_unit) - 1
+    unit_starts = np.flatnonzero(new_unit)
+    unit_count = len(unit_starts)
+    group_starts = np.flatnonzero(new_group)
+
+    # Match confidence per unit
+    unit_states = np.unique(unit_ids * len(states) + state_codes[order])
+    state_counts = np.bincount(unit_states // len(states), minlength=unit_count)
+    middle_names = all_names["middle_name"].to_numpy()[order]
+    has_middle = middle_names != ""
+    name_counts, unit_middle_names = compatible_middle_names(
+        middle_names[has_middle], unit_ids[has_middle], unit_count
+    )
+    unit_confidence = np.full(unit_count, None, dtype=object)
+    unit_confidence[state_counts > 1] = "LOW"
+    unit_confidence[name_counts > 1] = "MEDIUM"
+    unit_confidence[name_counts == 1] = "HIGH"
+    unit_matched = pd.notna(unit_confidence) & ~(
+        conflict[unit_starts] & ~has_origin[unit_starts]
+    )
 
-        if match_results:
-            for match_info in match_results:
-                # Multiple states - matched person
-                middle_name = match_info["middle_name"]
-                confidence = match_info["confidence"]
-                consensus_origin = match_info["origin_state"]
-                group_df = match_info["group_df"]
+    # Groups without a matched unit keep only their first record as a singleton
+    group_matched = np.maximum.reduceat(unit_matched[unit_ids], group_starts)
+    first_record = np.minimum.reduceat(order, group_starts)
+    singleton = ~group_matched[group_ids] & (order == first_record[group_ids])
+    matched = unit_matched[unit_ids]
+
+    # License date aggregates per unit
+    license_dates = all_names["license_date"].to_numpy(dtype="datetime64[ns]")[order]
+    missing_date = np.isnat(license_dates)
+    date_values = license_dates.view("i8")
+    no_date = np.iinfo(np.int64).max
+    active = all_names["license_active"].to_numpy()[order] == True
+    first_dates = np.minimum.reduceat(
+        np.where(missing_date, no_date, date_values), unit_starts
+    )
+    active_dates = np.minimum.reduceat(
+        np.where(missing_date | ~active, no_date, date_values), unit_starts
+    )
+    has_active = np.maximum.reduceat(active, unit_starts)
 
-                name_hash = generate_name_hash(
-                    first_name, last_name, "", consensus_origin or ""
-                )
+    first_license = (date_values == first_dates[unit_ids]) & ~missing_date
+    oldest_active_license = np.where(
+        has_active[unit_ids],
+        ((date_values == active_dates[unit_ids]) & ~missing_date).astype(object),
+        "N/A",
+    )
+    oldest_active_license[singleton] = np.where(
+        active[singleton], np.array(True, dtype=object), "N/A"
+    )
+    first_license[singleton] = True
+
+    # Matched units report their consensus origin, singletons their own
+    unit_origins = np.maximum.reduceat(origin_codes, unit_starts)
+    origin_codes = np.where(singleton, origin_codes, unit_origins[unit_ids])
+
+    emit = matched | singleton
+    rows = order[emit]
+    unit_ids = unit_ids[emit]
+    singleton = singleton[emit]
+
+    # Hash each distinct person key once and map it back onto their records
+    person_keys = (
+        first_codes[emit].astype(np.int64) * len(last_names) + last_codes[emit]
+    ) * len(origins) + origin_codes[emit]
+    person_keys, person_ids = np.unique(person_keys, return_inverse=True)
+    person_origins = person_keys % len(origins)
+    person_names = person_keys // len(origins)
+    name_hashes = generate_name_hashes(
+        first_names[person_names // len(last_names)],
+        last_names[person_names % len(last_names)],
+        None,
+        origins[person_origins],
+    )
 
-                first_license_date = group_df["license_date"].min()
+    license_dates = all_names["license_date"].iloc[rows]
+    license_years = license_dates.dt.year
+    if not license_years.isna().any():
+        license_years = license_years.astype("int64")
+
+    master_df = pd.DataFrame(
+        {
+            "name_hash": name_hashes[person_ids],
+            "license_state": all_names["source_state"].to_numpy()[rows],
+            "first_name": all_names["first_name"].to_numpy()[rows],
+            "middle_name": np.where(
+                singleton, middle_names[emit], unit_middle_names[unit_ids]
+            ),
+            "last_name": all_names["last_name_with_suffix"].to_numpy()[rows],
+            "match_confidence": np.where(
+                singleton, "SINGLETON", unit_confidence[unit_ids]
+            ),
+            "license_date": license_dates.to_numpy(),
+            "license_year": license_years.to_numpy(),
+            "origin_state": origins[origin_codes[emit]],
+            "license_active": all_names["license_active"].to_numpy()[rows],
+            "license_expiration_date": all_names["expiration_date"].to_numpy()[rows],
+            "first_license": first_license[emit],
+            "oldest_active_license": pd.Series(
+                oldest_active_license[emit], dtype=object
+            )
+            .infer_objects()
+            .to_numpy(),
+        }
+    )
 
-                earliest_active_license = group_df[group_df["license_active"] == True][
-                    "license_date"
-                ].min()
-                has_active_license = (
-                    True
-                    if len(group_df[group_df["license_active"] == True]) > 0
-                    else False
-                )
+    return compact_master_list(master_df).sort_values(["name_hash", "license_state"])
 
-                origin = group_df.sort_values(by="origin_state")
-
-                # Create one record per state for this matched person
-                for _, row in group_df.iterrows():
-                    master_records.append(
-                        {
-                            "name_hash": name_hash,
-                            "license_state": row["source_state"],
-                            "first_name": first_name,
-                            "middle_name": middle_name,
-                            "last_name": last_name,
-                            "match_confidence": confidence,
-                            "license_date": row["license_date"],
-                            "license_year": row["license_date"].year,
-                            "origin_state": origin.iloc[
-                                -1, origin.columns.get_loc("origin_state")
-                            ],
-                            "license_active": row["license_active"],
-                            "license_expiration_date": row["expiration_date"],
-                            "first_license": row["license_date"] == first_license_date,
-                            "oldest_active_license": (
-                                row["license_date"] == earliest_active_license
-                                if has_active_license == True
-                                else "N/A"
-                            ),
-                        }
-                    )
-        else:
-            # Singleton - single state, single record
-            row = group.iloc[0]
-            name_hash = generate_name_hash(
-                first_name, last_name, "", row["origin_state"] or ""
+
+def soundex(name):
+    """
+    American Soundex code of a name, used as a phonetic blocking key
+    """
+    letters = [letter for letter in name.upper() if "A" <= letter <= "Z"]
+    if not letters:
+        return ""
+
+    code = letters[0]
+    previous = soundex_codes.get(letters[0], "")
+    for letter in letters[1:]:
+        digit = soundex_codes.get(letter, "")
+        if digit and digit != previous:
+            code += digit
+        # H and W do not separate letters with the same code, vowels do
+        if letter not in "HW":
+            previous = digit
+    return (code + "000")[:4]
+
+
+def jaro_winkler(a, b):
+    """
+    Jaro-Winkler similarity of two strings, from 0 to 1
+    """
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+
+    window = max(max(len(a), len(b)) // 2 - 1, 0)
+    a_matched = [False] * len(a)
+    b_matched = [False] * len(b)
+    matches = 0
+    for i, letter in enumerate(a):
+        for j in range(max(0, i - window), min(len(b), i + window + 1)):
+            if not b_matched[j] and b[j] == letter:
+                a_matched[i] = b_matched[j] = True
+                matches += 1
+                break
+    if not matches:
+        return 0.0
+
+    a_letters = [letter for letter, matched in zip(a, a_matched) if matched]
+    b_letters = [letter for letter, matched in zip(b, b_matched) if matched]
+    transpositions = sum(x != y for x, y in zip(a_letters, b_letters)) / 2
+    jaro = (
+        matches / len(a) + matches / len(b) + (matches - transpositions) / matches
+    ) / 3
+
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def jaro_winkler_bounds(names, left, right, chunk_size=1 << 20):
+    """
+    Upper bounds of jaro_winkler(names[left], names[right]) for arrays of
+    pairs. The matching characters of two names are at most the letters they
+    have in common, which bounds the Jaro similarity, and the common prefix
+    bounds the Winkler boost. Pairs under the threshold can then be dropped
+    without scoring them one by one.
+    """
+    chars = np.array(names, dtype=str)
+    chars = chars.view(np.uint32).reshape(len(names), -1)
+    present = chars != 0
+    lengths = present.sum(axis=1)
+
+    # Letter counts per name, anything but A-Z shares one bin
+    bins = np.where((chars >= ord("A")) & (chars <= ord("Z")), chars - ord("A"), 26)
+    rows = np.broadcast_to(np.arange(len(names))[:, None], chars.shape)
+    counts = np.bincount(
+        (rows * 27 + bins)[present], minlength=len(names) * 27
+    ).reshape(len(names), 27)
+    counts = counts.astype(np.uint8 if counts.max() < 256 else np.int64)
+    starts = np.zeros((len(names), 4), dtype=np.uint32)
+    starts[:, : min(4, chars.shape[1])] = chars[:, :4]
+
+    bounds = np.empty(len(left))
+    for start in range(0, len(left), chunk_size):
+        i = left[start : start + chunk_size]
+        j = right[start : start + chunk_size]
+        common = np.minimum(counts[i], counts[j]).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            jaro = np.where(
+                common > 0, (common / lengths[i] + common / lengths[j] + 1) / 3, 0.0
             )
-            master_records.append(
-                {
-                    "name_hash": name_hash,
-                    "license_state": row["source_state"],
-                    "first_name": first_name,
-                    "middle_name": row["middle_name"],
-                    "last_name": last_name,
-                    "match_confidence": "SINGLETON",
-                    "license_date": row["license_date"],
-                    "license_year": row["license_date"].year,
-                    "origin_state": row["origin_state"],
-                    "license_active": row["license_active"],
-                    "license_expiration_date": row["expiration_date"],
-                    "first_license": True,
-                    "oldest_active_license": (
-                        row["license_active"]
-                        if row["license_active"] == True
-                        else "N/A"
-                    ),
-                }
+        same = (starts[i] == starts[j]) & (starts[i] != 0)
+        prefix = np.cumprod(same, axis=1).sum(axis=1)
+        bounds[start : start + chunk_size] = jaro + prefix * 0.1 * (1 - jaro)
+    return bounds
+
+
+def fuzzy_name_candidates(keys, window):
+    """
+    Candidate pairs of name keys from blocking. Keys are sorted within each
+    block and compared with the next window keys only, so the number of
+    pairs grows linearly with the number of keys. The blocks are:
+    first initial and Soundex of the last surname, first initial sorted by
+    last name, and first initial sorted by last surname (which brings
+    double and hyphenated surnames next to their single surname).
+    """
+    passes = [
+        (["initial", "phonetic"], ["given_name", "last_name"]),
+        (["initial"], ["last_name", "given_name"]),
+        (["initial"], ["surname", "given_name"]),
+    ]
+    lefts = []
+    rights = []
+    for block_columns, sort_columns in passes:
+        ordered = keys.sort_values(block_columns + sort_columns, kind="stable")
+        order = ordered.index.to_numpy()
+        blocks = ordered.groupby(block_columns, sort=False).ngroup().to_numpy()
+        for offset in range(1, window + 1):
+            same_block = blocks[offset:] == blocks[:-offset]
+            lefts.append(order[:-offset][same_block])
+            rights.append(order[offset:][same_block])
+
+    left = np.concatenate(lefts)
+    right = np.concatenate(rights)
+    # Passes find many of the same pairs; sort and drop the repeats
+    pairs = np.sort(np.minimum(left, right) * len(keys) + np.maximum(left, right))
+    pairs = pairs[np.append(True, pairs[1:] != pairs[:-1])] if len(pairs) else pairs
+    return pairs // len(keys), pairs % len(keys)
+
+
+def merge_fuzzy_name_keys(dfs_dict, threshold=0.9, window=5, max_length_gap=1):
+    """
+    Optional fuzzy linkage ahead of the exact linkage.
+    Name keys from different states that are near duplicates (misspellings,
+    hyphenated surnames, nicknames) are rewritten to the most common key of
+    their cluster, so the exact linkage and its confidence model see them as
+    one group.
+    Keys are only merged when they come from different states, agree on one
+    non-empty origin state and have the same suffix, so a merge never makes a
+    group the exact linkage splits on conflicting origins. The Winkler boost
+    favours shared prefixes, so last names more than max_length_gap letters
+    apart in length (SMITH and SMITHSON) are not compared.
+    Returns the standardized datasets with the rewritten names.
+    """
+    records = combine_license_records(dfs_dict)
+    if records.empty:
+        return dfs_dict
+
+    key_columns = ["first_name", "last_name_with_suffix"]
+    state_codes, _ = pd.factorize(records["source_state"])
+    if state_codes.max() >= 63:
+        raise ValueError("fuzzy linkage supports at most 63 source states")
+    records = records.assign(state_bit=np.left_shift(1, state_codes))
+    keys = records.groupby(key_columns, sort=True, observed=True).agg(
+        last_name=("last_name", "first"),
+        suffix=("suffix", "first"),
+        count=("state_bit", "size"),
+    )
+    keys["states"] = (
+        records.drop_duplicates(key_columns + ["state_bit"])
+        .groupby(key_columns, sort=True, observed=True)["state_bit"]
+        .sum()
+    )
+    # A key's origin state, "" where its records have none or disagree
+    origins = (
+        records.loc[records["origin_state"] != "", key_columns + ["origin_state"]]
+        .astype({"origin_state": object})
+        .groupby(key_columns, sort=True, observed=True)["origin_state"]
+        .agg(["first", "nunique"])
+    )
+    keys["origin_state"] = (
+        origins["first"].where(origins["nunique"] == 1, "").reindex(keys.index)
+    ).fillna("")
+    keys = keys.reset_index().astype(
+        {column: object for column in key_columns + ["last_name", "suffix"]}
+    )
+    keys["given_name"] = keys["first_name"].map(lambda name: nicknames.get(name, name))
+    keys["initial"] = keys["given_name"].str[:1]
+    keys["surname"] = keys["last_name"].str.split().str[-1].fillna("")
+    phonetic = {surname: soundex(surname) for surname in keys["surname"].unique()}
+    keys["phonetic"] = keys["surname"].map(phonetic)
+
+    left, right = fuzzy_name_candidates(keys, window)
+    states = keys["states"].to_numpy()
+    suffixes = keys["suffix"].to_numpy()
+    origin_states = keys["origin_state"].to_numpy()
+    plausible = (
+        ((states[left] & states[right]) == 0)
+        & (suffixes[left] == suffixes[right])
+        & (origin_states[left] == origin_states[right])
+        & (origin_states[left] != "")
+    )
+    left = left[plausible]
+    right = right[plausible]
+
+    first_names = keys["first_name"].to_numpy()
+    given_names = keys["given_name"].to_numpy()
+    last_names = keys["last_name"].to_numpy()
+    surnames = keys["surname"].to_numpy()
+    last_lengths = keys["last_name"].str.len().to_numpy()
+
+    # Only pairs whose similarity bounds reach the threshold are scored; a
+    # double surname matches its single surname whatever their lengths
+    same_given = given_names[left] == given_names[right]
+    same_surname = (last_names[left] == surnames[right]) | (
+        last_names[right] == surnames[left]
+    )
+    close_lengths = np.abs(last_lengths[left] - last_lengths[right]) <= max_length_gap
+    reachable = (
+        same_given | (jaro_winkler_bounds(first_names, left, right) >= threshold)
+    ) & (
+        same_surname
+        | (close_lengths & (jaro_winkler_bounds(last_names, left, right) >= threshold))
+    )
+    left = left[reachable]
+    right = right[reachable]
+
+    matches = []
+    for i, j in zip(left, right):
+        if given_names[i] == given_names[j]:
+            first_score = 1.0
+        else:
+            first_score = jaro_winkler(first_names[i], first_names[j])
+        if last_names[i] == surnames[j] or last_names[j] == surnames[i]:
+            last_score = 1.0
+        else:
+            last_score = jaro_winkler(last_names[i], last_names[j])
+        if first_score >= threshold and last_score >= threshold:
+            matches.append((first_score + last_score, i, j))
+
+    # Best matches are merged first, and never into a cluster that already
+    # holds a license from the same state
+    parent = list(range(len(keys)))
+    cluster_states = states.tolist()
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for _, i, j in sorted(matches, key=lambda match: -match[0]):
+        i, j = root(i), root(j)
+        if i != j and not cluster_states[i] & cluster_states[j]:
+            parent[j] = i
+            cluster_states[i] |= cluster_states[j]
+
+    clusters = np.array([root(i) for i in range(len(keys))])
+    if (clusters == np.arange(len(keys))).all():
+        return dfs_dict
+
+    # The key with the most records names its cluster, ties go to the first
+    by_count = np.lexsort((np.arange(len(keys)), -keys["count"].to_numpy()))
+    canonical = np.full(len(keys), -1)
+    for i in by_count:
+        if canonical[clusters[i]] < 0:
+            canonical[clusters[i]] = i
+    canonical = canonical[clusters]
+
+    renamed = canonical != np.arange(len(keys))
+    renames = pd.MultiIndex.from_arrays(
+        [first_names[renamed], keys["last_name_with_suffix"].to_numpy()[renamed]]
+    )
+    new_first_names = first_names[canonical[renamed]]
+    new_last_names = keys["last_name_with_suffix"].to_numpy()[canonical[renamed]]
+
+    merged = {}
+    for state, df in dfs_dict.items():
+        if df.empty:
+            merged[state] = df
+            continue
+        names = combine_license_records({state: df})
+        positions = renames.get_indexer(
+            pd.MultiIndex.from_arrays(
+                [names["first_name"], names["last_name_with_suffix"]]
             )
+        )
+        rows = positions >= 0
+        if not rows.any():
+            merged[state] = df
+            continue
+        df = df.copy()
+        # The canonical last name already carries its suffix
+        df.loc[rows, "first_name"] = new_first_names[positions[rows]]
+        df.loc[rows, "last_name"] = new_last_names[positions[rows]]
+        df.loc[rows, "suffix"] = ""
+        merged[state] = df
+    return merged
+
+
+def master_license_table(master_df):
+    """
+    Convert a master list to an Arrow table with explicit types: dictionary
+    encoded states and confidence, date32 dates, and a nullable boolean
+    oldest_active_license where the CSV has "N/A"
+    """
+    import pyarrow as pa
+
+    # origin_state keeps raw locations without a state code, so its number of
+    # categories depends on the exports
+    codes = pa.dictionary(pa.int32(), pa.string())
+    origin_states = master_df["origin_state"]
+    oldest_active = master_df["oldest_active_license"].map({True: True, False: False})
+
+    return pa.table(
+        {
+            "name_hash": pa.array(master_df["name_hash"], pa.string()),
+            "license_state": pa.array(master_df["license_state"], codes),
+            "first_name": pa.array(master_df["first_name"], pa.string()),
+            "middle_name": pa.array(master_df["middle_name"], pa.string()),
+            "last_name": pa.array(master_df["last_name"], pa.string()),
+            "match_confidence": pa.array(master_df["match_confidence"], codes),
+            "license_date": pa.array(master_df["license_date"], pa.date32()),
+            "license_year": pa.array(master_df["license_year"], pa.int16()),
+            "origin_state": pa.array(origin_states.where(origin_states != ""), codes),
+            "license_active": pa.array(master_df["license_active"], pa.bool_()),
+            "license_expiration_date": pa.array(
+                master_df["license_expiration_date"], pa.date32()
+            ),
+            "first_license": pa.array(master_df["first_license"], pa.bool_()),
+            "oldest_active_license": pa.array(
+                oldest_active.astype("boolean"), pa.bool_()
+            ),
+        }
+    )
 
-    # Convert to DataFrame
-    master_df = pd.DataFrame(master_records)
 
-    # Sort by name_hash and then by license_state
-    if not master_df.empty:
-        master_df = master_df.sort_values(["name_hash", "license_state"])
+def write_master_license_list(master_df, path, output_format="csv", compression=None):
+    """
+    Write a master list as CSV, Parquet or Arrow IPC, optionally compressed
+    with gzip or zstd (Arrow IPC only supports zstd).
+    path has no extension; returns the path written.
+    """
+    if output_format == "csv":
+        extensions = {None: ".csv", "gzip": ".csv.gz", "zstd": ".csv.zst"}
+        path += extensions[compression]
+        master_df.to_csv(path + ".tmp", index=False, compression=compression)
+    elif output_format == "parquet":
+        import pyarrow.parquet as pq
+
+        path += ".parquet"
+        pq.write_table(
+            master_license_table(master_df),
+            path + ".tmp",
+            compression=compression or "none",
+        )
+    elif output_format == "arrow":
+        import pyarrow.feather as feather
+
+        if compression == "gzip":
+            raise ValueError("Arrow IPC files support zstd compression, not gzip")
+        path += ".arrow"
+        feather.write_feather(
+            master_license_table(master_df),
+            path + ".tmp",
+            compression=compression or "uncompressed",
+        )
+    else:
+        raise ValueError(f"Unknown output format: {output_format}")
+    # Readers such as license_api reload the file when it changes, so it is
+    # replaced whole rather than rewritten in place
+    os.replace(path + ".tmp", path)
+    return path
+
 
+def publish_master_license_lists(master_all, master_active, publish_dir):
+    """
+    Publish both master lists as uncompressed Arrow IPC files in publish_dir
+    for open_master_license_table. Each file is replaced atomically, so
+    readers keep the mapping of the version they opened.
+    Returns the paths written.
+    """
+    import pyarrow.feather as feather
+
+    os.makedirs(publish_dir, exist_ok=True)
+    paths = []
+    for name, master_df in [("all", master_all), ("active", master_active)]:
+        path = os.path.join(publish_dir, f"master_{name}_licenses.arrow")
+        feather.write_feather(
+            master_license_table(master_df), path + ".tmp", compression="uncompressed"
+        )
+        os.replace(path + ".tmp", path)
+        paths.append(path)
+    return paths
+
+
+def open_master_license_table(path, columns=None):
+    """
+    Open a master list Arrow IPC file as a pyarrow Table without reading it:
+    the columns point into a memory map of the file, so only the columns
+    used are paged in and processes opening the same file share one copy.
+    columns selects some of the columns. Compressed files are decompressed
+    into memory instead.
+    """
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return table if columns is None else table.select(columns)
+
+
+# dtypes of a master list read back from any format, the pandas side of
+# master_license_table; CSV cells are converted to them on reading so
+# every format gives the same records
+master_list_dtypes = {
+    "name_hash": name_dtype,
+    "license_state": "category",
+    "first_name": name_dtype,
+    "middle_name": name_dtype,
+    "last_name": name_dtype,
+    "match_confidence": "category",
+    "license_date": "datetime64[ms]",
+    "license_year": "Int16",
+    "origin_state": "category",
+    "license_active": "boolean",
+    "license_expiration_date": "datetime64[ms]",
+    "first_license": "boolean",
+    "oldest_active_license": "boolean",
+}
+
+
+def read_master_license_list(path, columns=None):
+    """
+    Read a master list written by write_master_license_list, or only some of
+    its columns
+    """
+    if path.endswith(".parquet") or path.endswith(".arrow"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if path.endswith(".parquet"):
+            table = pq.read_table(path, columns=columns)
+        else:
+            table = open_master_license_table(path, columns)
+        nullable_types = {
+            pa.bool_(): pd.BooleanDtype(),
+            pa.int16(): pd.Int16Dtype(),
+            pa.string(): name_dtype,
+        }
+        return table.to_pandas(date_as_object=False, types_mapper=nullable_types.get)
+
+    # Only empty cells are missing; "NA" is a real origin state code
+    master_df = pd.read_csv(
+        path, usecols=columns, dtype=str, keep_default_na=False, na_values=[""]
+    )
+    for column in master_df.columns:
+        dtype = master_list_dtypes[column]
+        values = master_df[column]
+        if column in ["first_name", "middle_name", "last_name"]:
+            values = values.fillna("")
+        elif dtype == "boolean":
+            values = values.map({"True": True, "False": False})
+        elif dtype == "Int16":
+            values = pd.to_numeric(values)
+        elif dtype == "datetime64[ms]":
+            values = pd.to_datetime(values)
+        master_df[column] = values.astype(dtype)
     return master_df
 
 
+def peak_rss_mb():
+    """
+    Peak resident memory of this process so far in MB, None where the
+    resource module is not available
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+@contextmanager
+def pipeline_stage(report, name, state=None, rows_in=None, profiler=None):
+    """
+    Record a pipeline stage in report, a list of stage dicts: its wall and CPU
+    time, the peak RSS of the process after it and its rows in and out. Set
+    "rows_out" (and "rows_in" if not known up front) on the yielded dict.
+    While tracemalloc is tracing the memory the stage allocated and kept, and
+    its peak above what was allocated before it, are recorded as well.
+    A cProfile profiler, if given, profiles only this stage.
+    Nothing is recorded when report is None.
+    """
+    stage = {"stage": name, "state": state, "rows_in": rows_in, "rows_out": None}
+    tracing = report is not None and tracemalloc.is_tracing()
+    if tracing:
+        traced_before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield stage
+    finally:
+        if profiler is not None:
+            profiler.disable()
+    if report is None:
+        return
+
+    stage["wall_seconds"] = round(time.perf_counter() - wall_start, 6)
+    stage["cpu_seconds"] = round(time.process_time() - cpu_start, 6)
+    stage["peak_rss_mb"] = peak_rss_mb()
+    if tracing:
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        stage["traced_delta_mb"] = round((traced - traced_before) / (1 << 20), 3)
+        stage["traced_peak_mb"] = round((traced_peak - traced_before) / (1 << 20), 3)
+    report.append(stage)
+
+
+def write_run_report(report, path, **run):
+    """
+    Write the stages recorded in report as a JSON run report, with the run
+    details given as keyword arguments and wall and CPU time totals per stage
+    """
+    totals = {}
+    for stage in report:
+        total = totals.setdefault(
+            stage["stage"], {"count": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0}
+        )
+        total["count"] += 1
+        total["wall_seconds"] += stage["wall_seconds"]
+        total["cpu_seconds"] += stage["cpu_seconds"]
+    for total in totals.values():
+        total["wall_seconds"] = round(total["wall_seconds"], 6)
+        total["cpu_seconds"] = round(total["cpu_seconds"], 6)
+
+    with open(path + ".tmp", "w") as f:
+        json.dump({**run, "totals": totals, "stages": report}, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+# Records below which link_in_shards links in one process; at 200,000
+# records four workers took twice as long as one process
+shard_link_min_records = 500_000
+
+
+def partition_by_name_key(dfs_dict, shard_count):
+    """
+    Split standardized datasets into shards that each hold every record of
+    their name keys. Shards keep the state order and the record order.
+    """
+    shards = [{} for _ in range(shard_count)]
+    for state, df in dfs_dict.items():
+        keys = name_key_index(df).to_frame(index=False)
+        shard_ids = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+        shard_ids = shard_ids % shard_count
+        for shard_id, shard in enumerate(shards):
+            shard[state] = df[shard_ids == shard_id]
+    return shards
+
+
+def merge_master_shards(masters):
+    """
+    Combine master lists linked from separate name key shards
+    """
+    masters = [master for master in masters if not master.empty]
+    if not masters:
+        return pd.DataFrame()
+    # Ties only occur within a name key, so the stable sort keeps each
+    # shard's order for them
+    return compact_master_list(pd.concat(masters)).sort_values(
+        ["name_hash", "license_state"]
+    )
+
+
+def link_in_shards(dfs_dict, workers, link=link_master_license_lists, min_records=None):
+    """
+    Run a linkage function (link_master_license_lists or
+    link_master_license_list) on name key shards in a process pool and merge
+    the master lists it returns.
+    Starting the pool and pickling the shards costs seconds, which only the
+    per person work (name hashes, middle names) of large inputs spread over
+    several CPUs wins back. Inputs under min_records records, by default
+    shard_link_min_records, and single CPU machines link in this process and
+    print why when more than one worker was asked for.
+    """
+    if min_records is None:
+        min_records = shard_link_min_records
+    cpus = os.cpu_count() or 1
+    records = sum(len(df) for df in dfs_dict.values())
+    if min(workers, cpus) < 2 or records < min_records:
+        if workers > 1:
+            reason = (
+                "only 1 CPU is available"
+                if cpus < 2
+                else f"{records} records, sharding starts at {min_records}"
+            )
+            print(f"Linking in one process instead of {workers} workers: {reason}")
+        return link(dfs_dict)
+    workers = min(workers, cpus)
+
+    shards = partition_by_name_key(dfs_dict, workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(link, shards))
+
+    if isinstance(results[0], tuple):
+        return tuple(merge_master_shards(masters) for masters in zip(*results))
+    return merge_master_shards(results)
+
+
 def filter_active_licenses(df, state):
     """
     Filter dataframe to only include active licenses based on state-specific criteria
     """
-    df = df.copy()
+    if state not in state_schemas:
+        return df.copy()
+
+    schema = state_schemas[state]
+    return df[df[schema["status"]].isin(schema["active_statuses"])]
 
-    if state == "CA":
-        return df[df["License Status"] == "Active"]
 
-    elif state == "UT":
-        return df[df["LICENSE STATUS"] == "Active"]
+def read_state_export(path):
+    """
+    Read a state export, JSON exports are lists of records
+    """
+    if path.endswith(".json"):
+        return pd.read_json(path)
+    return pd.read_csv(path)
 
-    elif state == "IL":
-        return df[df["License Status"] == "ACTIVE"]
 
-    elif state == "GA":
-        return df[df["licenseStatus"].isin(["Active", "Active-Renewal Pending"])]
+def iter_json_records(path, block_size=1 << 20):
+    """
+    Yield the records of a JSON export one at a time, reading the file in
+    blocks instead of parsing it whole
+    """
+    decoder = json.JSONDecoder()
+    whitespace = re.compile(r"[\s,]*")
+    with open(path, encoding="utf-8") as f:
+        buffer = f.read(block_size).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{path} is not a JSON array of records")
+        pos = 1
+        exhausted = False
+        while True:
+            pos = whitespace.match(buffer, pos).end()
+            if buffer.startswith("]", pos):
+                return
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The record runs past the end of the block
+                if exhausted:
+                    raise
+                block = f.read(block_size)
+                exhausted = not block
+                buffer = buffer[pos:] + block
+                pos = 0
+                continue
+            yield record
 
-    elif state == "HI":
-        return df[df["status"] == "Current, Valid & In Good Standing"]
 
-    elif state == "NV":
-        return df[df["status"] == "ACTIVE"]
+def read_state_export_chunks(path, state, chunksize):
+    """
+    Read a state export as frames of at most chunksize rows, keeping only the
+    columns standardize_dataset uses.
+    Cells are read as strings so every chunk gets the same types whatever
+    values it happens to hold.
+    """
+    columns = export_columns(state)
+    if path.endswith(".json"):
+        records = []
+        for record in iter_json_records(path):
+            records.append(record)
+            if len(records) == chunksize:
+                yield pd.DataFrame(records, columns=columns)
+                records = []
+        if records:
+            yield pd.DataFrame(records, columns=columns)
+        return
+
+    yield from pd.read_csv(path, usecols=columns, dtype=str, chunksize=chunksize)
+
+
+def standardize_export(path, state, chunksize=None, report=None, errors=None):
+    """
+    Read and standardize one state export.
+    With a chunksize each chunk is standardized as soon as it is read, so no
+    more than one chunk of raw rows is in memory at a time.
+    Stages are recorded in report if given, see pipeline_stage, and the
+    error tables of validate_dataset appended to errors if given.
+    """
+    if not chunksize:
+        with pipeline_stage(report, "read", state) as stage:
+            df = read_state_export(path)
+            stage["rows_out"] = len(df)
+        with pipeline_stage(report, "standardize", state, len(df)) as stage:
+            standardized = standardize_dataset(df, state)
+            stage["rows_out"] = len(standardized)
+        if errors is not None:
+            with pipeline_stage(report, "validate", state, len(df)) as stage:
+                errors.append(validate_dataset(df, standardized, state))
+                stage["rows_out"] = len(errors[-1])
+        return standardized
+
+    # Reading, standardizing and validating interleave chunk by chunk, so
+    # they are one stage
+    with pipeline_stage(report, "read_standardize", state) as stage:
+        chunks = []
+        first_row = 0
+        for chunk in read_state_export_chunks(path, state, chunksize):
+            chunks.append(standardize_dataset(chunk, state))
+            if errors is not None:
+                errors.append(validate_dataset(chunk, chunks[-1], state, first_row))
+            first_row += len(chunk)
+        if chunks:
+            # Each chunk has its own state categories, which the concat drops
+            standardized = compact_license_records(pd.concat(chunks, ignore_index=True))
+        else:
+            standardized = standardize_dataset(
+                pd.DataFrame(columns=export_columns(state)), state
+            )
+        stage["rows_in"] = stage["rows_out"] = len(standardized)
+    return standardized
 
-    elif state == "WA":
-        return df[df["status"] == "Active"]
 
-    elif state == "OR":
-        return df[df["Status"] == "Active"]
+def file_digest(path):
+    """
+    SHA-256 of a file's contents
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
-    elif state == "AK":
-        return df[df["Status"] == "Active"]
 
-    elif state == "OK":
-        return df[df["LicenseStatusTypeName"] == "Active"]
+def name_key_index(standardized_df):
+    """
+    (first_name, last_name_with_suffix) name keys of a standardized dataset
+    """
+    records = combine_license_records({"": standardized_df})
+    return pd.MultiIndex.from_arrays(
+        [records["first_name"], records["last_name_with_suffix"]]
+    )
+
+
+def cached_standardize_dataset(
+    path,
+    state,
+    cache_dir,
+    max_cache_bytes=1 << 30,
+    chunksize=None,
+    report=None,
+    errors=None,
+):
+    """
+    standardize_dataset for a state export through an on-disk Parquet cache.
+    Entries are keyed by the export's contents, the state and
+    standardization_version, and the least recently used entries are evicted
+    once the cache grows past max_cache_bytes.
+    Exports read from the cache are not validated again; their failures were
+    reported when they were cached.
+    """
+    key = hashlib.sha256(
+        f"{file_digest(path)}|{state}|{standardization_version}".encode()
+    ).hexdigest()
+    cache_path = os.path.join(cache_dir, f"{state}-{key[:32]}.parquet")
+
+    if os.path.exists(cache_path):
+        # The modification time doubles as the last use for eviction
+        os.utime(cache_path)
+        with pipeline_stage(report, "cache_read", state) as stage:
+            # Parquet gives names back as python backed strings
+            df = compact_license_records(pd.read_parquet(cache_path))
+            stage["rows_out"] = len(df)
+        return df
+
+    df = standardize_export(path, state, chunksize, report, errors)
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    df.to_parquet(temp_path)
+    os.replace(temp_path, cache_path)
+    evict_cache_entries(cache_dir, max_cache_bytes)
     return df
 
 
-if __name__ == "__main__":
-    dfs = {
-        "IL": pd.read_csv("./clean/20251129_il_se.csv"),
-        "CA": pd.read_csv("./clean/20251129_ca_se.csv"),
-        "GA": pd.read_json("./clean/20251129_ga_se.json"),
-        "NV": pd.read_json("./clean/20251202_nv_se.json"),
-        "HI": pd.read_json("./clean/20251201_hi_se.json"),
-        "UT": pd.read_csv("./clean/20251128_ut_se.csv"),
-        "WA": pd.read_json("./clean/20260101_wa_se.json"),
-        "OK": pd.read_json("./clean/2025_ok_se.json"),
-        "OR": pd.read_csv("./clean/20251129_or_se.csv"),
-        "AK": pd.read_csv("./clean/20251129_ak_se.csv"),
+def evict_cache_entries(cache_dir, max_cache_bytes):
+    """
+    Remove least recently used cache entries until the cache fits in
+    max_cache_bytes
+    """
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith(".parquet"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total_bytes = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_bytes <= max_cache_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Another process loading a state evicted it first
+            pass
+        total_bytes -= size
+
+
+def load_standardized_dataset(
+    state,
+    path,
+    cache_dir=None,
+    max_cache_bytes=1 << 30,
+    chunksize=None,
+    report=None,
+    errors=None,
+):
+    """
+    Read and standardize one state export, through the cache if given
+    """
+    if cache_dir:
+        return cached_standardize_dataset(
+            path, state, cache_dir, max_cache_bytes, chunksize, report, errors
+        )
+    return standardize_export(path, state, chunksize, report, errors)
+
+
+def load_reported_dataset(state, path, cache_dir, max_cache_bytes, chunksize):
+    """
+    load_standardized_dataset in a worker process, returning the standardized
+    dataset, the stages recorded while loading it and its error tables
+    """
+    report = []
+    errors = []
+    df = load_standardized_dataset(
+        state, path, cache_dir, max_cache_bytes, chunksize, report, errors
+    )
+    return df, report, errors
+
+
+def load_standardized_datasets(
+    exports,
+    cache_dir=None,
+    max_cache_bytes=1 << 30,
+    workers=1,
+    chunksize=None,
+    report=None,
+    errors=None,
+):
+    """
+    Read and standardize every state export.
+    With more than one worker each state is loaded in its own process; the
+    results are collected in the order of exports whichever finishes first.
+    Stages are recorded in report and error tables appended to errors if
+    given; those of worker processes are sent back with their dataset.
+    """
+    if workers <= 1:
+        return {
+            state: load_standardized_dataset(
+                state, path, cache_dir, max_cache_bytes, chunksize, report, errors
+            )
+            for state, path in exports.items()
+        }
+
+    reported = report is not None or errors is not None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            state: executor.submit(
+                load_reported_dataset if reported else load_standardized_dataset,
+                state,
+                path,
+                cache_dir,
+                max_cache_bytes,
+                chunksize,
+            )
+            for state, path in exports.items()
+        }
+        if not reported:
+            return {state: future.result() for state, future in futures.items()}
+
+        standardized_dfs = {}
+        for state, future in futures.items():
+            standardized_dfs[state], stages, tables = future.result()
+            if report is not None:
+                report.extend(stages)
+            if errors is not None:
+                errors.extend(tables)
+        return standardized_dfs
+
+
+# Layout of the incremental store; stores of another version are rebuilt
+store_version = 1
+
+
+def read_store_manifest(store_dir):
+    """
+    The manifest of an incremental store, checked before anything in the
+    store is unpickled: it has to be of this store_version and
+    standardization_version, and every file it lists has to still have the
+    SHA-256 it was written with. Returns None, after saying why, for a store
+    that cannot be used.
+    """
+    manifest_path = os.path.join(store_dir, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return None
+
+    problem = None
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if (
+            manifest.get("store_version") != store_version
+            or manifest.get("standardization_version") != standardization_version
+        ):
+            problem = "it was written by another version"
+        else:
+            for name, digest in manifest["files"].items():
+                path = os.path.join(store_dir, name)
+                if not os.path.isfile(path) or file_digest(path) != digest:
+                    problem = f"{name} is missing or was changed"
+                    break
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        problem = f"its manifest cannot be read ({e!r})"
+    if problem:
+        print(f"Rebuilding the incremental store in {store_dir}: {problem}")
+        return None
+    return manifest
+
+
+def update_master_license_lists(
+    exports, store_dir, chunksize=None, report=None, errors=None
+):
+    """
+    Incrementally rebuild the "all" and "active" master lists.
+    store_dir keeps the standardized datasets, the digests of the exports they
+    came from and the master rows of the last run. Only states whose export
+    changed are standardized again, and only the name keys those states had or
+    now have are linked again, which gives the same lists as a full run.
+    Returns the standardized datasets and both master lists.
+    Stages are recorded in report if given, see pipeline_stage, and the
+    error tables of the states standardized again appended to errors.
+    A store that read_store_manifest rejects is rebuilt from the exports.
+    """
+    os.makedirs(os.path.join(store_dir, "standardized"), exist_ok=True)
+    manifest_path = os.path.join(store_dir, "manifest.json")
+    master_names = {"all": "master_all.pkl", "active": "master_active.pkl"}
+    master_paths = {
+        name: os.path.join(store_dir, file_name)
+        for name, file_name in master_names.items()
+    }
+
+    def frame_name(state, digest):
+        return os.path.join("standardized", f"{state}-{digest}.pkl")
+
+    def frame_path(state, digest):
+        return os.path.join(store_dir, frame_name(state, digest))
+
+    manifest = read_store_manifest(store_dir) or {
+        "states": [],
+        "digests": {},
+        "files": {},
     }
+    # SHA-256 of each file the new manifest lists
+    files = {}
+
+    # Ties in the final sort follow the order states are combined in, so a
+    # different state list needs a full rebuild
+    full_rebuild = manifest["states"] != list(exports)
+
+    standardized_dfs = {}
+    touched_keys = []
+    digests = {}
+    for state, path in exports.items():
+        digests[state] = file_digest(path)
+        previous_digest = manifest["digests"].get(state)
+        if previous_digest == digests[state]:
+            standardized_dfs[state] = pd.read_pickle(frame_path(state, digests[state]))
+            name = frame_name(state, digests[state])
+            files[name] = manifest["files"][name]
+            continue
+
+        if not full_rebuild and previous_digest:
+            previous_df = pd.read_pickle(frame_path(state, previous_digest))
+            touched_keys.append(name_key_index(previous_df))
+        standardized_dfs[state] = standardize_export(
+            path, state, chunksize, report, errors
+        )
+        standardized_dfs[state].to_pickle(frame_path(state, digests[state]))
+        files[frame_name(state, digests[state])] = file_digest(
+            frame_path(state, digests[state])
+        )
+        touched_keys.append(name_key_index(standardized_dfs[state]))
+
+    if full_rebuild:
+        with pipeline_stage(
+            report, "link", rows_in=sum(map(len, standardized_dfs.values()))
+        ) as stage:
+            master_all, master_active = link_master_license_lists(standardized_dfs)
+            stage["rows_out"] = len(master_all)
+    elif touched_keys:
+        touched = touched_keys[0].append(touched_keys[1:]).unique()
+        touched_dfs = {
+            state: df[name_key_index(df).isin(touched)]
+            for state, df in standardized_dfs.items()
+        }
+        with pipeline_stage(
+            report, "link", rows_in=sum(map(len, touched_dfs.values()))
+        ) as stage:
+            relinked = link_master_license_lists(touched_dfs)
+            stage["rows_out"] = len(relinked[0])
+
+        # Name keys no changed state touches keep their previous master rows
+        masters = []
+        for path, master in zip(master_paths.values(), relinked):
+            previous = pd.read_pickle(path)
+            if not previous.empty:
+                previous = previous[
+                    ~pd.MultiIndex.from_arrays(
+                        [previous["first_name"], previous["last_name"]]
+                    ).isin(touched)
+                ]
+            parts = [df for df in [previous, master] if not df.empty]
+            if parts:
+                master = compact_master_list(pd.concat(parts)).sort_values(
+                    ["name_hash", "license_state"]
+                )
+            masters.append(master)
+        master_all, master_active = masters
+    else:
+        master_all, master_active = [
+            pd.read_pickle(path) for path in master_paths.values()
+        ]
+
+    for master, name in zip([master_all, master_active], master_names.values()):
+        path = os.path.join(store_dir, name)
+        master.to_pickle(path + ".tmp")
+        files[name] = file_digest(path + ".tmp")
+        os.replace(path + ".tmp", path)
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(
+            {
+                "store_version": store_version,
+                "standardization_version": standardization_version,
+                "states": list(exports),
+                "digests": digests,
+                "files": files,
+            },
+            f,
+            indent=2,
+        )
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    # Drop standardized datasets of exports that have been replaced
+    current = {os.path.basename(frame_path(*item)) for item in digests.items()}
+    for name in os.listdir(os.path.join(store_dir, "standardized")):
+        if name not in current:
+            os.remove(os.path.join(store_dir, "standardized", name))
+
+    return standardized_dfs, master_all, master_active
+
+
+if __name__ == "__main__":
+    # Imported here as polars_licenses imports this module
+    from polars_licenses import load_standardized_datasets_lazy
+
+    parser = argparse.ArgumentParser(
+        description="Build master SE license lists from the state exports"
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--two-pass",
+        action="store_true",
+        help="filter, standardize and link active licenses separately",
+    )
+    mode.add_argument(
+        "--incremental",
+        metavar="DIR",
+        help="keep standardized states and master rows in DIR and only re-link "
+        "the name keys touched by changed exports",
+    )
+    mode.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        help="cache standardized state datasets as Parquet files in DIR",
+    )
+    parser.add_argument(
+        "--cache-size-mb",
+        type=int,
+        default=1024,
+        help="evict least recently used cache entries past this size",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="processes used to read and standardize the state exports",
+    )
+    parser.add_argument(
+        "--link-workers",
+        type=int,
+        default=1,
+        help="processes used to link name key shards; only pays off from "
+        "about half a million records on a machine with that many CPUs",
+    )
+    parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="also link near duplicate names across states (misspellings, "
+        "hyphenated surnames, nicknames)",
+    )
+    parser.add_argument(
+        "--fuzzy-threshold",
+        type=float,
+        default=0.9,
+        help="Jaro-Winkler similarity both first and last names need to link",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["pandas", "polars"],
+        default="pandas",
+        help="read and standardize the exports with pandas, or as lazy Polars "
+        "queries that only read the columns used",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        metavar="ROWS",
+        help="stream each state export in chunks of this many rows instead of "
+        "reading it whole",
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=["csv", "parquet", "arrow"],
+        default="csv",
+        help="file format of the master license lists",
+    )
+    parser.add_argument(
+        "--compression",
+        choices=["gzip", "zstd"],
+        help="compress the master license lists",
+    )
+    parser.add_argument(
+        "--aggregates-dir",
+        # Where the src/*.json.js data loaders read them from
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "aggregates"),
+        help="directory the dashboard aggregate JSON files are written to "
+        "(default: aggregates next to this script)",
+    )
+    parser.add_argument(
+        "--publish",
+        metavar="DIR",
+        help="also publish both master lists as uncompressed Arrow IPC files in "
+        "DIR that readers can memory-map",
+    )
+    parser.add_argument(
+        "--database",
+        metavar="PATH",
+        help="also load both master lists into an indexed SQLite database",
+    )
+    parser.add_argument(
+        "--errors",
+        metavar="PATH",
+        help="write the data quality failures found while standardizing, one "
+        "row per failing cell, as CSV to PATH",
+    )
+    parser.add_argument(
+        "--report",
+        metavar="PATH",
+        help="write a JSON run report with the time, memory and row counts of "
+        "each pipeline stage",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="also record the memory each stage allocates with tracemalloc "
+        "(slows the run down)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="dump cProfile stats of the linkage stages to PATH",
+    )
+    args = parser.parse_args()
+    if args.two_pass and args.chunk_size:
+        parser.error("--chunk-size cannot be used with --two-pass")
+    if args.incremental and args.fuzzy:
+        parser.error("--fuzzy cannot be used with --incremental")
+    if args.engine == "polars":
+        if args.incremental or args.cache_dir or args.chunk_size or args.workers > 1:
+            parser.error(
+                "--engine polars cannot be used with --incremental, --cache-dir, "
+                "--chunk-size or --workers"
+            )
+        try:
+            import polars  # noqa: F401
+        except ImportError:
+            parser.error("--engine polars needs the polars package")
+    # Check the writers' optional dependencies before the run rather than at
+    # the write stage, after all the processing
+    if args.output_format == "arrow" and args.compression == "gzip":
+        parser.error("--output-format arrow supports zstd compression, not gzip")
+    if args.output_format == "csv" and args.compression == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            parser.error("zstd compressed CSV needs the zstandard package")
+    if args.output_format != "csv" or args.publish:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("Parquet, Arrow IPC and --publish need the pyarrow package")
+
+    run_started = datetime.now()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    report = []
+    errors = []
+    if args.trace_memory:
+        tracemalloc.start()
+    profiler = cProfile.Profile() if args.profile else None
+
+    def dataset_rows(dfs_dict):
+        return sum(len(df) for df in dfs_dict.values())
+
+    if args.incremental:
+        standardized_dfs_all, master_all, master_active = update_master_license_lists(
+            state_exports, args.incremental, args.chunk_size, report, errors
+        )
+    elif args.two_pass:
+        if args.engine == "polars":
+            with pipeline_stage(report, "scan_standardize") as stage:
+                standardized_dfs_all = load_standardized_datasets_lazy(
+                    state_exports, errors=errors
+                )
+                stage["rows_out"] = dataset_rows(standardized_dfs_all)
+        else:
+            dfs = {}
+            for state, path in state_exports.items():
+                with pipeline_stage(report, "read", state) as stage:
+                    dfs[state] = read_state_export(path)
+                    stage["rows_out"] = len(dfs[state])
+            standardized_dfs_all = {}
+            for state, df in dfs.items():
+                with pipeline_stage(report, "standardize", state, len(df)) as stage:
+                    standardized_dfs_all[state] = standardize_dataset(df, state)
+                    stage["rows_out"] = len(standardized_dfs_all[state])
+                with pipeline_stage(report, "validate", state, len(df)) as stage:
+                    errors.append(
+                        validate_dataset(df, standardized_dfs_all[state], state)
+                    )
+                    stage["rows_out"] = len(errors[-1])
+        if args.fuzzy:
+            with pipeline_stage(
+                report, "fuzzy", rows_in=dataset_rows(standardized_dfs_all)
+            ) as stage:
+                standardized_dfs_all = merge_fuzzy_name_keys(
+                    standardized_dfs_all, args.fuzzy_threshold
+                )
+                stage["rows_out"] = dataset_rows(standardized_dfs_all)
+        with pipeline_stage(
+            report,
+            "link",
+            rows_in=dataset_rows(standardized_dfs_all),
+            profiler=profiler,
+        ) as stage:
+            if args.link_workers > 1:
+                master_all = link_in_shards(
+                    standardized_dfs_all, args.link_workers, link_master_license_list
+                )
+            else:
+                master_all = link_master_license_list(standardized_dfs_all)
+            stage["rows_out"] = len(master_all)
+    else:
+        # Both master lists come from the one standardized frame
+        if args.engine == "polars":
+            with pipeline_stage(report, "scan_standardize") as stage:
+                standardized_dfs_all = load_standardized_datasets_lazy(
+                    state_exports, errors=errors
+                )
+                stage["rows_out"] = dataset_rows(standardized_dfs_all)
+        else:
+            standardized_dfs_all = load_standardized_datasets(
+                state_exports,
+                args.cache_dir,
+                args.cache_size_mb << 20,
+                args.workers,
+                args.chunk_size,
+                report,
+                errors,
+            )
+        if args.fuzzy:
+            with pipeline_stage(
+                report, "fuzzy", rows_in=dataset_rows(standardized_dfs_all)
+            ) as stage:
+                standardized_dfs_all = merge_fuzzy_name_keys(
+                    standardized_dfs_all, args.fuzzy_threshold
+                )
+                stage["rows_out"] = dataset_rows(standardized_dfs_all)
+        with pipeline_stage(
+            report,
+            "link",
+            rows_in=dataset_rows(standardized_dfs_all),
+            profiler=profiler,
+        ) as stage:
+            if args.link_workers > 1:
+                master_all, master_active = link_in_shards(
+                    standardized_dfs_all, args.link_workers
+                )
+            else:
+                master_all, master_active = link_master_license_lists(
+                    standardized_dfs_all
+                )
+            # One linkage builds both lists; rows_out counts the "all" list
+            stage["rows_out"] = len(master_all)
+            stage["active_rows_out"] = len(master_active)
 
     # Print initial record counts
     total_records = 0
     print("\nInitial Dataset Sizes:")
-    for state, df in dfs.items():
+    for state, df in standardized_dfs_all.items():
         record_count = len(df)
         total_records += record_count
         print(f"{state}: {record_count:,} records")
     print(f"Total initial records: {total_records:,}")
 
+    # Data quality failures found while standardizing
+    quality = quality_summary(errors)
+    print("\nData Quality Failures:")
+    for state in standardized_dfs_all:
+        counts = quality.get(state, {})
+        failures = ", ".join(f"{count:,} {reason}" for reason, count in counts.items())
+        print(f"{state}: {failures or 'none'}")
+    if args.errors:
+        error_tables = [table for table in errors if len(table)]
+        error_table = (
+            pd.concat(error_tables, ignore_index=True)
+            if error_tables
+            else pd.DataFrame(columns=quality_columns)
+        )
+        error_table.to_csv(args.errors, index=False)
+        print(f"Data quality failures written to {args.errors}")
+
     # Process all licenses
     print("\n=== Processing ALL Licenses ===")
-    standardized_dfs_all = {}
-    for state, df in dfs.items():
-        standardized_dfs_all[state] = standardize_dataset(df, state)
-
-    master_all = create_master_license_list(standardized_dfs_all)
-    master_all.to_csv("master_all_licenses.csv", index=False)
+    with pipeline_stage(report, "write", rows_in=len(master_all)) as stage:
+        stage["path"] = write_master_license_list(
+            master_all, "master_all_licenses", args.output_format, args.compression
+        )
+        stage["rows_out"] = len(master_all)
 
     # Print summary for all licenses
     unique_people_all = master_all["name_hash"].nunique()
@@ -658,25 +2613,75 @@ if __name__ == "__main__":
     # Process active licenses
     print("\n=== Processing ACTIVE Licenses ===")
     filtered_dfs = {}
+    if args.two_pass and args.engine == "polars":
+        # The status filter is pushed down into the scans
+        with pipeline_stage(report, "scan_standardize_active") as stage:
+            standardized_dfs_active = load_standardized_datasets_lazy(
+                state_exports, active_only=True
+            )
+            stage["rows_out"] = dataset_rows(standardized_dfs_active)
     total_active = 0
     print("\nActive License Counts:")
-    for state, df in dfs.items():
-        filtered_df = filter_active_licenses(df, state)
-        filtered_dfs[state] = filtered_df
-        active_count = len(filtered_df)
+    for state, df in standardized_dfs_all.items():
+        if args.two_pass and args.engine == "polars":
+            active_count = len(standardized_dfs_active[state])
+        elif args.two_pass:
+            with pipeline_stage(
+                report, "filter_active", state, len(dfs[state])
+            ) as stage:
+                filtered_dfs[state] = filter_active_licenses(dfs[state], state)
+                stage["rows_out"] = len(filtered_dfs[state])
+            active_count = len(filtered_dfs[state])
+        else:
+            active_count = int(df["license_active"].sum())
         total_active += active_count
         inactive_count = len(df) - active_count
         print(f"{state}: {active_count:,} active, {inactive_count:,} inactive")
     print(f"Total active licenses: {total_active:,}")
     print(f"Total inactive licenses: {total_records - total_active:,}")
 
-    # Standardize active licenses
-    standardized_dfs_active = {}
-    for state, df in filtered_dfs.items():
-        standardized_dfs_active[state] = standardize_dataset(df, state)
-
-    master_active = create_master_license_list(standardized_dfs_active)
-    master_active.to_csv("master_active_licenses.csv", index=False)
+    if args.two_pass:
+        # Standardize active licenses
+        if args.engine == "pandas":
+            standardized_dfs_active = {}
+            for state, df in filtered_dfs.items():
+                with pipeline_stage(
+                    report, "standardize_active", state, len(df)
+                ) as stage:
+                    standardized_dfs_active[state] = standardize_dataset(df, state)
+                    stage["rows_out"] = len(standardized_dfs_active[state])
+        if args.fuzzy:
+            with pipeline_stage(
+                report, "fuzzy_active", rows_in=dataset_rows(standardized_dfs_active)
+            ) as stage:
+                standardized_dfs_active = merge_fuzzy_name_keys(
+                    standardized_dfs_active, args.fuzzy_threshold
+                )
+                stage["rows_out"] = dataset_rows(standardized_dfs_active)
+
+        with pipeline_stage(
+            report,
+            "link_active",
+            rows_in=dataset_rows(standardized_dfs_active),
+            profiler=profiler,
+        ) as stage:
+            if args.link_workers > 1:
+                master_active = link_in_shards(
+                    standardized_dfs_active,
+                    args.link_workers,
+                    link_master_license_list,
+                )
+            else:
+                master_active = link_master_license_list(standardized_dfs_active)
+            stage["rows_out"] = len(master_active)
+    with pipeline_stage(report, "write", rows_in=len(master_active)) as stage:
+        stage["path"] = write_master_license_list(
+            master_active,
+            "master_active_licenses",
+            args.output_format,
+            args.compression,
+        )
+        stage["rows_out"] = len(master_active)
 
     # Print summary for active licenses
     unique_people_active = master_active["name_hash"].nunique()
@@ -702,3 +2707,43 @@ if __name__ == "__main__":
         .unique()
     )
     print(f"\nMulti-state license holders: {len(multi_state_hashes):,}")
+
+    # Dashboard aggregates for the site's data loaders
+    with pipeline_stage(
+        report, "write_aggregates", rows_in=len(master_all) + len(master_active)
+    ):
+        write_dashboard_aggregates(master_all, master_active, args.aggregates_dir)
+    print(f"Dashboard aggregates written to {args.aggregates_dir}")
+
+    if args.publish:
+        with pipeline_stage(
+            report, "publish", rows_in=len(master_all) + len(master_active)
+        ):
+            publish_master_license_lists(master_all, master_active, args.publish)
+        print(f"Master license lists published to {args.publish}")
+
+    if args.database:
+        with pipeline_stage(
+            report, "write_database", rows_in=len(master_all) + len(master_active)
+        ):
+            write_master_license_database(master_all, master_active, args.database)
+        print(f"Master license database written to {args.database}")
+
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+        print(f"Linkage profile written to {args.profile}")
+    if args.report:
+        write_run_report(
+            report,
+            args.report,
+            started=run_started.isoformat(timespec="seconds"),
+            argv=sys.argv[1:],
+            wall_seconds=round(time.perf_counter() - wall_start, 6),
+            cpu_seconds=round(time.process_time() - cpu_start, 6),
+            peak_rss_mb=peak_rss_mb(),
+            total_records=total_records,
+            data_quality=quality,
+            master_all_rows=len(master_all),
+            master_active_rows=len(master_active),
+        )
+        print(f"Run report written to {args.report}")
@@ -0,0 +1,98 @@
+import pandas as pd
+
+from diff_master_licenses import diff_master_license_lists
+
+
+def master_list(licenses):
+    """
+    A master list of (name_hash, license state, last name, active,
+    expiration date) licenses
+    """
+    df = pd.DataFrame(
+        licenses,
+        columns=[
+            "name_hash",
+            "license_state",
+            "last_name",
+            "license_active",
+            "license_expiration_date",
+        ],
+    )
+    return df.assign(
+        first_name="JOHN",
+        license_expiration_date=pd.to_datetime(df["license_expiration_date"]),
+    )
+
+
+def changes(diff):
+    return {
+        (row.name_hash[:1], row.license_state): row.change for row in diff.itertuples()
+    }
+
+
+old_master = master_list(
+    [
+        ("b" * 16, "CA", "BAKER", True, "2025-06-01"),
+        ("b" * 16, "UT", "BAKER", True, "2024-03-01"),
+        ("c" * 16, "UT", "CLARK", True, "2025-01-01"),
+        ("d" * 16, "UT", "DAVIS", False, "2020-01-01"),
+        ("e" * 16, "OR", "EVANS", True, "2027-01-01"),
+        ("f" * 16, "CA", "FOX", True, "2026-01-01"),
+    ]
+)
+new_master = master_list(
+    [
+        # Sorts before every old key
+        ("a" * 16, "UT", "ADAMS", True, "2027-01-01"),
+        ("b" * 16, "CA", "BAKER", True, "2025-06-01"),
+        ("b" * 16, "UT", "BAKER", False, "2024-03-01"),
+        ("b" * 16, "WA", "BAKER", True, "2027-01-01"),
+        ("c" * 16, "UT", "CLARK", True, "2025-01-01"),
+        ("d" * 16, "UT", "DAVIS", True, "2028-01-01"),
+        # EVANS changed origin state, which gives a new name_hash
+        ("g" * 16, "OR", "EVANS", True, "2027-01-01"),
+        # Sorts after every old key
+        ("z" * 16, "NV", "ZHANG", True, "2027-01-01"),
+    ]
+)
+
+
+def test_diff_change_kinds():
+    diff = diff_master_license_lists(old_master, new_master)
+    assert changes(diff) == {
+        ("a", "UT"): "new_licensee",
+        ("b", "UT"): "lapsed",
+        ("b", "WA"): "new_state",
+        ("d", "UT"): "reinstated",
+        ("e", "OR"): "dropped",
+        ("f", "CA"): "dropped",
+        ("g", "OR"): "new_licensee",
+        ("z", "NV"): "new_licensee",
+    }
+    lapsed = diff[diff["change"] == "lapsed"].iloc[0]
+    assert lapsed["active_before"] and not lapsed["active_after"]
+    dropped = diff[diff["change"] == "dropped"]
+    assert dropped["active_after"].isna().all()
+    assert dropped["expiration_before"].notna().all()
+
+
+def test_diff_expired_window():
+    # BAKER's CA license expires on new_date and CLARK's UT one on old_date
+    diff = diff_master_license_lists(
+        old_master, new_master, pd.Timestamp("2025-01-01"), pd.Timestamp("2025-06-01")
+    )
+    found = changes(diff)
+    assert found[("b", "CA")] == "expired"
+    assert ("c", "UT") not in found
+    # Lapsed licenses are reported as lapsed, not expired
+    assert found[("b", "UT")] == "lapsed"
+
+
+def test_diff_of_identical_and_empty_snapshots():
+    assert diff_master_license_lists(old_master, old_master).empty
+    diff = diff_master_license_lists(old_master.iloc[:0], new_master)
+    assert (diff["change"] == "new_licensee").all()
+    assert len(diff) == len(new_master)
+    diff = diff_master_license_lists(old_master, new_master.iloc[:0])
+    assert (diff["change"] == "dropped").all()
+    assert len(diff) == len(old_master)
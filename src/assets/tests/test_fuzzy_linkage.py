@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+
+from benchmark_licenses import generate_state_rosters
+from process_all_licenses import (
+    link_master_license_lists,
+    merge_fuzzy_name_keys,
+    standardize_dataset,
+)
+
+
+def standardized(state, people):
+    """
+    A standardized dataset of state licenses held by (first name, last name,
+    suffix, origin state) people
+    """
+    df = pd.DataFrame(people, columns=["first_name", "last_name", "suffix", "origin"])
+    return pd.DataFrame(
+        {
+            "first_name": df["first_name"],
+            "middle_name": "",
+            "last_name": df["last_name"],
+            "suffix": df["suffix"],
+            "source_state": state,
+            "license_date": pd.Timestamp("2010-01-01"),
+            "origin_state": df["origin"],
+            "license_active": True,
+            "expiration_date": pd.Timestamp("2026-01-01"),
+        }
+    )
+
+
+def merged_names(dfs_dict):
+    merged = merge_fuzzy_name_keys(dfs_dict)
+    return {
+        state: list(zip(df["first_name"], df["last_name"], df["suffix"]))
+        for state, df in merged.items()
+    }
+
+
+def test_misspelled_name_merges():
+    names = merged_names(
+        {
+            "CA": standardized("CA", [("JOHN", "JOHNSON", "", "UT")]),
+            "UT": standardized("UT", [("JON", "JONHSON", "", "UT")]),
+        }
+    )
+    assert names["CA"] == names["UT"]
+
+
+@pytest.mark.parametrize(
+    "ca, ut",
+    [
+        # Surnames that are prefixes of longer ones
+        (("JOHN", "SMITH", "", "UT"), ("JOHN", "SMITHSON", "", "UT")),
+        (("JOHN", "FOROL", "", "UT"), ("JOHN", "FOROLROS", "", "UT")),
+        # A suffix on one side only
+        (("JOHN", "VALCARWOOD", "IV", "UT"), ("JOHN", "VALCARWOOD", "", "UT")),
+        # Different or missing origin states
+        (("JOHN", "JOHNSON", "", "UT"), ("JOHN", "JONHSON", "", "CA")),
+        (("JOHN", "JOHNSON", "", "UT"), ("JOHN", "JONHSON", "", "")),
+    ],
+)
+def test_unlikely_matches_stay_apart(ca, ut):
+    names = merged_names(
+        {"CA": standardized("CA", [ca]), "UT": standardized("UT", [ut])}
+    )
+    assert names["CA"] != names["UT"]
+
+
+def test_fuzzy_linkage_keeps_every_license():
+    rosters = generate_state_rosters(3000, overlap=0.3, seed=7)
+    standardized_dfs = {
+        state: standardize_dataset(roster, state) for state, roster in rosters.items()
+    }
+    exact_all, exact_active = link_master_license_lists(standardized_dfs)
+    fuzzy_all, fuzzy_active = link_master_license_lists(
+        merge_fuzzy_name_keys(standardized_dfs)
+    )
+    assert len(fuzzy_all) >= len(exact_all)
+    assert len(fuzzy_active) >= len(exact_active)
+    assert fuzzy_all["name_hash"].nunique() <= exact_all["name_hash"].nunique()
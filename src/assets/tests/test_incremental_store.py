@@ -0,0 +1,98 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from benchmark_licenses import generate_state_rosters, write_state_rosters
+from process_all_licenses import (
+    link_master_license_lists,
+    load_standardized_datasets,
+    update_master_license_lists,
+)
+
+states = ["UT", "CA", "IL"]
+
+
+def assert_same_masters(masters, expected):
+    for master, expected_master in zip(masters, expected):
+        pd.testing.assert_frame_equal(
+            master.reset_index(drop=True), expected_master.reset_index(drop=True)
+        )
+
+
+def full_rebuild(exports):
+    return link_master_license_lists(load_standardized_datasets(exports))
+
+
+@pytest.fixture
+def store(tmp_path):
+    """
+    Exports of three states and an incremental store built from them
+    """
+    rosters = generate_state_rosters(300, states=states, seed=19)
+    exports = write_state_rosters(rosters, tmp_path / "exports")
+    store_dir = str(tmp_path / "store")
+    update_master_license_lists(exports, store_dir)
+    return rosters, exports, store_dir
+
+
+def test_refreshing_one_state_matches_a_full_rebuild(store, tmp_path, capsys):
+    rosters, exports, store_dir = store
+    ut = rosters["UT"].copy()
+    # Rename some licensees, drop others and lapse some more
+    ut.loc[ut.index[:20], "FULL NAME"] += "SON"
+    ut = ut.drop(ut.index[20:40])
+    ut.loc[ut.index[20:60], "LICENSE STATUS"] = "Expired"
+    write_state_rosters({"UT": ut}, tmp_path / "exports")
+
+    _, master_all, master_active = update_master_license_lists(exports, store_dir)
+    assert_same_masters([master_all, master_active], full_rebuild(exports))
+    assert "Rebuilding" not in capsys.readouterr().out
+    # Only the current standardized dataset of each state is kept
+    assert len(os.listdir(os.path.join(store_dir, "standardized"))) == len(states)
+
+
+def test_unchanged_exports_reuse_the_store(store):
+    _, exports, store_dir = store
+    _, master_all, master_active = update_master_license_lists(exports, store_dir)
+    assert_same_masters([master_all, master_active], full_rebuild(exports))
+
+
+def corrupt_master(store_dir):
+    with open(os.path.join(store_dir, "master_all.pkl"), "r+b") as f:
+        f.truncate(100)
+
+
+def garble_manifest(store_dir):
+    with open(os.path.join(store_dir, "manifest.json"), "w") as f:
+        f.write("{not json")
+
+
+def older_version(store_dir):
+    path = os.path.join(store_dir, "manifest.json")
+    with open(path) as f:
+        manifest = json.load(f)
+    manifest["store_version"] = 0
+    with open(path, "w") as f:
+        json.dump(manifest, f)
+
+
+def missing_dataset(store_dir):
+    directory = os.path.join(store_dir, "standardized")
+    os.remove(os.path.join(directory, sorted(os.listdir(directory))[0]))
+
+
+@pytest.mark.parametrize(
+    "damage", [corrupt_master, garble_manifest, older_version, missing_dataset]
+)
+def test_damaged_stores_are_rebuilt(store, capsys, damage):
+    _, exports, store_dir = store
+    capsys.readouterr()
+    damage(store_dir)
+    _, master_all, master_active = update_master_license_lists(exports, store_dir)
+    assert "Rebuilding the incremental store" in capsys.readouterr().out
+    assert_same_masters([master_all, master_active], full_rebuild(exports))
+    # The rebuilt store is usable again
+    update_master_license_lists(exports, store_dir)
+    assert "Rebuilding" not in capsys.readouterr().out
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+import license_api
+from benchmark_licenses import generate_state_rosters
+from license_api import LicenseApi
+from process_all_licenses import (
+    link_master_license_lists,
+    standardize_dataset,
+    write_master_license_list,
+)
+
+
+class Writer:
+    """
+    Stands in for the StreamWriter of a connection
+    """
+
+    def __init__(self):
+        self.data = b""
+        self.closed = False
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+rosters = generate_state_rosters(200, states=["UT", "CA", "IL"], seed=11)
+masters = link_master_license_lists(
+    {state: standardize_dataset(roster, state) for state, roster in rosters.items()}
+)
+
+
+def serve(out_dir, output_format="csv"):
+    """
+    A LicenseApi over the master lists written in one format
+    """
+    paths = [
+        write_master_license_list(master, str(out_dir / name), output_format)
+        for name, master in zip(["all", "active"], masters)
+    ]
+    api = LicenseApi(*paths)
+    asyncio.run(api.current_index())
+    return api
+
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    return serve(tmp_path_factory.mktemp("masters"))
+
+
+def get(api, target):
+    """
+    Status line and JSON body of a GET request
+    """
+
+    async def request():
+        reader = asyncio.StreamReader()
+        reader.feed_data(f"GET {target} HTTP/1.1\r\nHost: test\r\n\r\n".encode())
+        reader.feed_eof()
+        writer = Writer()
+        await api.handle(reader, writer)
+        assert writer.closed
+        return writer.data
+
+    head, body = asyncio.run(request()).split(b"\r\n\r\n", 1)
+    return head.split(b"\r\n")[0].decode(), json.loads(body)
+
+
+def test_responses_are_bounded(api, monkeypatch):
+    monkeypatch.setattr(license_api, "response_cache_size", 2)
+    index = api.index
+    index.responses.clear()
+    for target in ["/states?state=UT", "/states?state=CA", "/states?state=UT"]:
+        assert get(api, target)[0] == "HTTP/1.1 200 OK"
+    get(api, "/states?state=IL")
+    assert [key[1] for key in index.responses] == [
+        (("state", "UT"),),
+        (("state", "IL"),),
+    ]
+
+
+def test_unexpected_errors_get_a_response(api, monkeypatch):
+    def fail(path, query):
+        raise RuntimeError("broken aggregate")
+
+    monkeypatch.setattr(api.index, "build", fail)
+    status, body = get(api, "/states?year=1999")
+    assert status == "HTTP/1.1 500 Internal Server Error"
+    assert body == {"error": "internal server error"}
+    assert get(api, "/nowhere")[0] == "HTTP/1.1 404 Not Found"
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_formats_give_the_same_responses(api, tmp_path, output_format):
+    columnar_api = serve(tmp_path, output_format)
+    assert sorted(os.listdir(tmp_path)) == [
+        f"active.{output_format}",
+        f"all.{output_format}",
+    ]
+    name_hashes = masters[0]["name_hash"]
+    # Someone with no middle name and a license without an oldest active flag
+    targets = [
+        "/licensees/" + name_hashes[masters[0]["middle_name"] == ""].iloc[0],
+        "/licensees/"
+        + name_hashes[masters[0]["oldest_active_license"] == "N/A"].iloc[0],
+        "/states?state=UT",
+        "/state-by-year",
+        "/license-age",
+    ]
+    for target in targets:
+        assert get(columnar_api, target) == get(api, target)
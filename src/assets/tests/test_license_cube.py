@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+from benchmark_licenses import generate_state_rosters
+from license_cube import LicenseCube, count_aggregates
+from process_all_licenses import link_master_license_lists, standardize_dataset
+
+rosters = generate_state_rosters(200, states=["UT", "CA", "IL", "GA"], seed=17)
+master_all, master_active = link_master_license_lists(
+    {state: standardize_dataset(roster, state) for state, roster in rosters.items()}
+)
+cube = LicenseCube.build(master_all)
+
+
+def grouped_counts(master_df, *columns):
+    """
+    Row counts per combination of columns, labelled like the cube's cells
+    """
+    values = pd.DataFrame(
+        {
+            column: (
+                master_df[column]
+                if column == "license_year"
+                else master_df[column].astype(object).fillna("")
+            )
+            for column in columns
+        }
+    )
+    counts = values.groupby(list(columns), dropna=False).size()
+    return {
+        key if isinstance(key, tuple) else (key,): count
+        for key, count in counts.items()
+    }
+
+
+def cells(cube):
+    return {labels: count for labels, count in cube.cells()}
+
+
+def same_cells(found, expected):
+    # NaN years never compare equal, so compare them by position in the sort
+    def normalized(counts):
+        return sorted(
+            (tuple("nan" if pd.isna(label) else label for label in labels), count)
+            for labels, count in counts.items()
+        )
+
+    return normalized(found) == normalized(expected)
+
+
+def test_cube_counts_every_row():
+    assert cube.counts.sum() == len(master_all)
+    assert cube.counts.shape == tuple(len(cube.labels[d]) for d in cube.dimensions)
+
+
+def test_rollup_matches_groupby():
+    assert same_cells(
+        cells(cube.rollup("license_state", "origin_state")),
+        grouped_counts(master_all, "license_state", "origin_state"),
+    )
+    # Axes come in the order asked for
+    assert same_cells(
+        cells(cube.rollup("origin_state", "license_state")),
+        grouped_counts(master_all, "origin_state", "license_state"),
+    )
+    assert same_cells(
+        cells(cube.rollup("license_year")),
+        grouped_counts(master_all, "license_year"),
+    )
+
+
+def test_slice_matches_filtered_groupby():
+    selected = master_all[master_all["license_state"].isin(["UT", "GA"])]
+    sliced = cube.slice(license_state=["UT", "GA"], license_active=True)
+    assert same_cells(
+        cells(sliced.rollup("license_state", "match_confidence")),
+        grouped_counts(
+            selected[selected["license_active"] == True],
+            "license_state",
+            "match_confidence",
+        ),
+    )
+    assert cube.slice(license_state="NOWHERE").counts.sum() == 0
+
+
+def test_cumulative_matches_running_totals():
+    years = master_all["license_year"].dropna()
+    expected = years.value_counts().sort_index().cumsum()
+    running = cube.rollup("license_year").cumulative()
+    assert np.array_equal(running.labels["license_year"], expected.index.to_numpy())
+    assert running.counts.tolist() == expected.tolist()
+
+
+def test_count_aggregates_match_groupby():
+    aggregates = count_aggregates(cube, LicenseCube.build(master_active))
+    expected = master_active["license_state"].astype(object).value_counts()
+    assert {
+        row["license_state"]: row["count"] for row in aggregates["state-license-count"]
+    } == expected.to_dict()
+    new_by_state_year = {
+        (row["state"], row["year"]): row["count"]
+        for row in aggregates["state-by-year"]["license_type"]
+        if row["status"] == "New"
+    }
+    first = master_all[master_all["first_license"] == True]
+    assert new_by_state_year == {
+        (state, int(year)): count
+        for (state, year), count in grouped_counts(
+            first.dropna(subset=["license_year"]), "license_state", "license_year"
+        ).items()
+    }
@@ -0,0 +1,63 @@
+import pandas as pd
+
+from license_index import LicenseIndex
+
+
+def master_list(people):
+    """
+    A master list of (first name, last name, license state) licenses
+    """
+    df = pd.DataFrame(people, columns=["first_name", "last_name", "license_state"])
+    return df.assign(
+        name_hash=df["first_name"] + df["last_name"],
+        middle_name="",
+        match_confidence="LOW",
+        origin_state="UT",
+        license_date=pd.Timestamp("2010-01-01"),
+        license_expiration_date=pd.Timestamp("2026-01-01"),
+        license_active=True,
+        first_license=True,
+        oldest_active_license=True,
+    )
+
+
+index = LicenseIndex.build(
+    master_list(
+        [
+            ("CHARLES", "ANAN", "UT"),
+            ("JANE", "ANAN", "CA"),
+            ("JOHN", "ANDERSON", "UT"),
+            ("JOHN", "ANDERSON", "NV"),
+            ("JAMES", "BAKER", "UT"),
+            ("JOHN", "AN", "CA"),
+        ]
+    )
+)
+
+
+def names(rows):
+    return sorted(
+        (record["first_name"], record["last_name"], record["license_state"])
+        for record in index.records(rows)
+    )
+
+
+def test_search_last_name_and_first_prefix():
+    assert names(index.search("ANAN", "J")) == [("JANE", "ANAN", "CA")]
+
+
+def test_search_last_prefix():
+    assert len(index.search("AN", last_prefix=True)) == 5
+
+
+def test_search_last_prefix_with_first_prefix_and_states():
+    assert names(index.search("AN", "J", ["UT", "CA"], last_prefix=True)) == [
+        ("JANE", "ANAN", "CA"),
+        ("JOHN", "AN", "CA"),
+        ("JOHN", "ANDERSON", "UT"),
+    ]
+
+
+def test_search_last_prefix_without_matches():
+    assert len(index.search("ZZ", "J", last_prefix=True)) == 0
+    assert len(index.search("AN", "J", ["IL"], last_prefix=True)) == 0
@@ -0,0 +1,49 @@
+import os
+
+import pandas as pd
+import pytest
+
+from benchmark_licenses import generate_state_rosters
+from process_all_licenses import (
+    link_in_shards,
+    link_master_license_lists,
+    standardize_dataset,
+)
+
+rosters = generate_state_rosters(500, overlap=0.3, seed=5)
+standardized_dfs = {
+    state: standardize_dataset(roster, state) for state, roster in rosters.items()
+}
+record_count = sum(len(df) for df in standardized_dfs.values())
+
+
+@pytest.fixture
+def two_cpus(monkeypatch):
+    # A pool of two processes runs on one CPU too, so the sharded path is
+    # tested on single CPU machines
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+
+
+@pytest.mark.parametrize("min_records", [0, record_count + 1])
+def test_sharded_linkage_matches(two_cpus, capsys, min_records):
+    expected = link_master_license_lists(standardized_dfs)
+    linked = link_in_shards(standardized_dfs, 2, min_records=min_records)
+    sharded = "instead of 2 workers" not in capsys.readouterr().out
+    assert sharded == (min_records <= record_count)
+    for master, expected_master in zip(linked, expected):
+        pd.testing.assert_frame_equal(
+            master.reset_index(drop=True), expected_master.reset_index(drop=True)
+        )
+
+
+def test_small_inputs_say_they_are_not_sharded(two_cpus, capsys):
+    link_in_shards(standardized_dfs, 2, link=len, min_records=record_count + 1)
+    assert f"{record_count} records, sharding starts at" in capsys.readouterr().out
+
+
+def test_single_cpu_says_it_is_not_sharded(monkeypatch, capsys):
+    monkeypatch.setattr(os, "cpu_count", lambda: 1)
+    assert link_in_shards(standardized_dfs, 4, link=len, min_records=0) == len(
+        standardized_dfs
+    )
+    assert "only 1 CPU" in capsys.readouterr().out
@@ -0,0 +1,116 @@
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from benchmark_licenses import generate_state_rosters
+from master_database import (
+    master_sqlite_columns,
+    master_sqlite_indexes,
+    master_sqlite_views,
+    write_master_license_database,
+)
+from process_all_licenses import link_master_license_lists, standardize_dataset
+
+rosters = generate_state_rosters(200, states=["UT", "CA", "IL"], seed=23)
+master_all, master_active = link_master_license_lists(
+    {state: standardize_dataset(roster, state) for state, roster in rosters.items()}
+)
+
+
+@pytest.fixture(scope="module")
+def database(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("db") / "master_licenses.db")
+    assert write_master_license_database(master_all, master_active, path) == path
+    assert os.listdir(os.path.dirname(path)) == ["master_licenses.db"]
+    connection = sqlite3.connect(path)
+    yield connection
+    connection.close()
+
+
+def query(database, sql, *parameters):
+    return pd.read_sql_query(sql, database, params=parameters)
+
+
+@pytest.mark.parametrize(
+    "table, master",
+    [("master_all_licenses", master_all), ("master_active_licenses", master_active)],
+)
+def test_tables_round_trip(database, table, master):
+    rows = query(database, f"SELECT * FROM {table} ORDER BY rowid")
+    assert list(rows.columns) == list(master_sqlite_columns)
+    master = master.reset_index(drop=True)
+    for column in ["name_hash", "license_state", "first_name", "last_name"]:
+        assert rows[column].tolist() == master[column].astype(str).tolist()
+    for column in ["license_date", "license_expiration_date"]:
+        expected = master[column].dt.strftime("%Y-%m-%d")
+        assert rows[column].tolist() == expected.where(expected.notna(), None).tolist()
+    origins = master["origin_state"].astype(object).replace("", None)
+    assert (
+        rows["origin_state"].tolist() == origins.where(origins.notna(), None).tolist()
+    )
+    assert (
+        rows["license_active"].tolist() == master["license_active"].astype(int).tolist()
+    )
+    oldest = database.execute(
+        f"SELECT oldest_active_license FROM {table} ORDER BY rowid"
+    )
+    assert [value for (value,) in oldest] == [
+        None if value == "N/A" else int(value)
+        for value in master["oldest_active_license"]
+    ]
+
+
+def test_name_hash_lookups_use_the_index(database):
+    name_hash = master_all["name_hash"].iloc[0]
+    plan = query(
+        database,
+        "EXPLAIN QUERY PLAN SELECT * FROM master_all_licenses WHERE name_hash = ?",
+        name_hash,
+    )
+    assert "master_all_licenses_name_hash" in " ".join(plan["detail"])
+    rows = query(
+        database, "SELECT * FROM master_all_licenses WHERE name_hash = ?", name_hash
+    )
+    assert len(rows) == (master_all["name_hash"] == name_hash).sum()
+
+    indexes = query(database, "SELECT name FROM sqlite_master WHERE type = 'index'")
+    assert set(indexes["name"]) == {
+        f"{table}_{column}"
+        for table in ["master_all_licenses", "master_active_licenses"]
+        for column in master_sqlite_indexes
+    }
+
+
+def test_views_match_the_master_lists(database):
+    views = query(database, "SELECT name FROM sqlite_master WHERE type = 'view'")
+    assert set(views["name"]) == set(master_sqlite_views)
+
+    counts = query(database, "SELECT * FROM state_license_counts")
+    expected = master_active["license_state"].astype(str).value_counts()
+    assert dict(zip(counts["license_state"], counts["count"])) == expected.to_dict()
+
+    by_year = query(database, "SELECT * FROM state_year_counts")
+    dated = master_all.dropna(subset=["license_year"])
+    expected = dated.groupby(
+        [dated["license_state"].astype(str), dated["license_year"].astype(int)]
+    ).agg(
+        active=("license_active", "sum"),
+        new=("first_license", "sum"),
+        total=("license_active", "size"),
+    )
+    found = by_year.set_index(["license_state", "license_year"]).sort_index()
+    assert found["active"].tolist() == expected["active"].tolist()
+    assert found["new"].tolist() == expected["new"].tolist()
+    assert (found["active"] + found["inactive"]).tolist() == expected["total"].tolist()
+
+    licensees = query(database, "SELECT * FROM licensee_license_counts")
+    expected = master_active["name_hash"].value_counts()
+    assert dict(zip(licensees["name_hash"], licensees["licenses"])) == (
+        expected.to_dict()
+    )
+
+    confidence = query(database, "SELECT * FROM match_confidence_counts")
+    assert confidence["all_count"].sum() == len(master_all)
+    assert confidence["active_count"].sum() == (master_all["license_active"]).sum()
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from benchmark_licenses import generate_state_rosters
+from process_all_licenses import (
+    compact_master_list,
+    link_master_license_lists,
+    open_master_license_table,
+    publish_master_license_lists,
+    read_master_license_list,
+    standardize_dataset,
+    write_master_license_list,
+)
+
+rosters = generate_state_rosters(300, states=["UT", "CA", "IL"], seed=13)
+master_all, master_active = link_master_license_lists(
+    {state: standardize_dataset(roster, state) for state, roster in rosters.items()}
+)
+
+
+def wide_origins(master_df):
+    """
+    The master list with more distinct origin values than an int8
+    dictionary index holds
+    """
+    origins = pd.Series([f"LOCATION {i}" for i in range(len(master_df))])
+    return compact_master_list(
+        master_df.assign(origin_state=origins.to_numpy()).reset_index(drop=True)
+    )
+
+
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_columnar_masters_hold_many_origins(tmp_path, output_format):
+    master = wide_origins(master_all)
+    assert master["origin_state"].nunique() > 127
+    path = write_master_license_list(
+        master, str(tmp_path / "master_all_licenses"), output_format
+    )
+    read_back = read_master_license_list(path)
+    assert (
+        read_back["origin_state"].astype(str).tolist()
+        == master["origin_state"].astype(str).tolist()
+    )
+
+
+def test_publish_many_origins(tmp_path):
+    masters = [wide_origins(master_all), wide_origins(master_active)]
+    paths = publish_master_license_lists(*masters, str(tmp_path / "pub"))
+    for path, master in zip(paths, masters):
+        origins = open_master_license_table(path, ["origin_state"])["origin_state"]
+        assert origins.to_pylist() == master["origin_state"].astype(str).tolist()
+    assert sorted(entry.name for entry in (tmp_path / "pub").iterdir()) == [
+        "master_active_licenses.arrow",
+        "master_all_licenses.arrow",
+    ]
+
+
+def test_missing_csv_compressor_fails_before_the_run(tmp_path):
+    try:
+        import zstandard  # noqa: F401
+
+        pytest.skip("zstandard is installed")
+    except ImportError:
+        pass
+    script = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), "process_all_licenses.py"
+    )
+    result = subprocess.run(
+        [sys.executable, script, "--compression", "zstd"],
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 2
+    assert "zstandard" in result.stderr
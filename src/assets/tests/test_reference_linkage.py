@@ -0,0 +1,335 @@
+import pandas as pd
+import pytest
+
+from benchmark_licenses import generate_state_rosters
+from process_all_licenses import (
+    combine_license_records,
+    compact_master_list,
+    generate_name_hashes,
+    link_master_license_list,
+    standardize_dataset,
+)
+
+# The original group by group linkage, kept as the reference the array based
+# link_master_license_list must reproduce
+
+
+def determine_origin_state(group_df):
+    """
+    Determine the consensus origin state for a group of records.
+    Returns the origin state if there's consensus, None if conflicting.
+    """
+    # Get all non-null origin states
+    origin_states = group_df[
+        group_df["origin_state"].notna() & (group_df["origin_state"] != "")
+    ]["origin_state"].unique()
+
+    if len(origin_states) == 0:
+        # No origin state information available
+        return None
+    elif len(origin_states) == 1:
+        # Consensus - all records agree on origin state
+        return origin_states[0]
+    else:
+        # Conflict - different origin states found
+        return "CONFLICT"
+
+
+def process_middle_names_and_states(group_df):
+    """
+    Process a group of names to find compatible middle names and determine match confidence.
+    Also checks for origin state conflicts.
+    Returns information about the match including confidence level.
+    """
+    # Check origin state first - if there's a conflict, split into separate groups
+    consensus_origin = determine_origin_state(group_df)
+
+    if consensus_origin == "CONFLICT":
+        # Split by origin state and process separately
+        results = []
+        for origin_state, origin_group in group_df.groupby(
+            "origin_state", observed=True
+        ):
+            if pd.isna(origin_state) or origin_state == "":
+                continue
+            result = process_middle_names_and_states_internal(
+                origin_group, origin_state
+            )
+            if result:
+                results.append(result)
+        return results if results else None
+    else:
+        # No conflict, process as one group
+        result = process_middle_names_and_states_internal(group_df, consensus_origin)
+        return [result] if result else None
+
+
+def process_middle_names_and_states_internal(group_df, consensus_origin):
+    """
+    Process a group of names to find compatible middle names and determine match confidence.
+    Returns information about the match including confidence level.
+    """
+    # Separate records with and without middle names
+    has_middle = group_df[
+        group_df["middle_name"].notna() & (group_df["middle_name"] != "")
+    ].copy()
+    no_middle = group_df[
+        group_df["middle_name"].isna() | (group_df["middle_name"] == "")
+    ].copy()
+
+    # Extract all middle names and their states
+    name_state_pairs = []
+    for _, row in has_middle.iterrows():
+        if pd.notna(row["middle_name"]) and row["middle_name"]:
+            for name in row["middle_name"].split(","):
+                name = name.strip()
+                if name:
+                    name_state_pairs.append((name, row["source_state"]))
+
+    # Separate full names and initials
+    full_names = [
+        (name, state)
+        for name, state in name_state_pairs
+        if len(name.replace(" ", "")) > 1
+    ]
+    initials = [
+        (name, state)
+        for name, state in name_state_pairs
+        if len(name.replace(" ", "")) == 1
+    ]
+
+    # Find compatible matches
+    compatible_pairs = []
+    compatible_pairs.extend(full_names)
+
+    # Only add initials that match full names
+    for initial, state in initials:
+        if any(name.startswith(initial) for name, _ in full_names):
+            compatible_pairs.append((initial, state))
+
+    # Determine match confidence
+    if compatible_pairs:
+        compatible_pairs.sort(key=lambda x: (len(x[0]) == 1, x[0]))
+        compatible_names = sorted(set(name for name, _ in compatible_pairs))
+        compatible_states = sorted(set(state for _, state in compatible_pairs))
+
+        if not no_middle.empty:
+            compatible_states = sorted(
+                set(compatible_states) | set(no_middle["source_state"])
+            )
+
+        if len(compatible_names) == 1:
+            confidence = "HIGH"
+        else:
+            confidence = "MEDIUM"
+
+        middle_name_result = ", ".join(compatible_names)
+    elif len(group_df["source_state"].unique()) > 1:
+        confidence = "LOW"
+        middle_name_result = ""
+        compatible_states = sorted(group_df["source_state"].unique())
+    else:
+        # Single state, single record - singleton
+        return None
+
+    return {
+        "middle_name": middle_name_result,
+        "states": compatible_states,
+        "confidence": confidence,
+        "origin_state": consensus_origin,
+        "group_df": group_df,
+    }
+
+
+def create_master_license_list(dfs_dict):
+    """
+    Create a master list where each record represents one license in one state.
+    All matched names get the same hash.
+    """
+    # Combine all dataframes; the per group work on small frames is faster
+    # on plain object columns than on the compact dtypes
+    all_names = combine_license_records(dfs_dict)
+    all_names = all_names.astype(
+        {
+            column: object
+            for column, dtype in all_names.dtypes.items()
+            if not pd.api.types.is_datetime64_any_dtype(dtype)
+            and not pd.api.types.is_bool_dtype(dtype)
+        }
+    )
+
+    # Store all license records
+    master_records = []
+
+    # Process each name group
+    for name_key, group in all_names.groupby(["first_name", "last_name_with_suffix"]):
+        first_name = name_key[0]
+        last_name = name_key[1]
+
+        # Process the group to find matches
+        match_results = process_middle_names_and_states(group)
+
+        if match_results:
+            for match_info in match_results:
+                # Multiple states - matched person
+                middle_name = match_info["middle_name"]
+                confidence = match_info["confidence"]
+                consensus_origin = match_info["origin_state"]
+                group_df = match_info["group_df"]
+
+                first_license_date = group_df["license_date"].min()
+
+                earliest_active_license = group_df[group_df["license_active"] == True][
+                    "license_date"
+                ].min()
+                has_active_license = (
+                    True
+                    if len(group_df[group_df["license_active"] == True]) > 0
+                    else False
+                )
+
+                origin = group_df.sort_values(by="origin_state")
+
+                # Create one record per state for this matched person
+                for _, row in group_df.iterrows():
+                    master_records.append(
+                        {
+                            "name_hash": None,
+                            "hash_origin": consensus_origin,
+                            "license_state": row["source_state"],
+                            "first_name": first_name,
+                            "middle_name": middle_name,
+                            "last_name": last_name,
+                            "match_confidence": confidence,
+                            "license_date": row["license_date"],
+                            "license_year": row["license_date"].year,
+                            "origin_state": origin.iloc[
+                                -1, origin.columns.get_loc("origin_state")
+                            ],
+                            "license_active": row["license_active"],
+                            "license_expiration_date": row["expiration_date"],
+                            "first_license": row["license_date"] == first_license_date,
+                            "oldest_active_license": (
+                                row["license_date"] == earliest_active_license
+                                if has_active_license == True
+                                else "N/A"
+                            ),
+                        }
+                    )
+        else:
+            # Singleton - single state, single record
+            row = group.iloc[0]
+            master_records.append(
+                {
+                    "name_hash": None,
+                    "hash_origin": row["origin_state"],
+                    "license_state": row["source_state"],
+                    "first_name": first_name,
+                    "middle_name": row["middle_name"],
+                    "last_name": last_name,
+                    "match_confidence": "SINGLETON",
+                    "license_date": row["license_date"],
+                    "license_year": row["license_date"].year,
+                    "origin_state": row["origin_state"],
+                    "license_active": row["license_active"],
+                    "license_expiration_date": row["expiration_date"],
+                    "first_license": True,
+                    "oldest_active_license": (
+                        row["license_active"]
+                        if row["license_active"] == True
+                        else "N/A"
+                    ),
+                }
+            )
+
+    # Convert to DataFrame
+    master_df = pd.DataFrame(master_records)
+
+    # Hash every person's name key in one batch
+    if not master_df.empty:
+        master_df["name_hash"] = generate_name_hashes(
+            master_df["first_name"],
+            master_df["last_name"],
+            None,
+            master_df.pop("hash_origin"),
+        )
+    master_df = compact_master_list(master_df)
+
+    # Sort by name_hash and then by license_state
+    if not master_df.empty:
+        master_df = master_df.sort_values(["name_hash", "license_state"])
+
+    return master_df
+
+
+def standardized(state, people):
+    """
+    A standardized dataset of state licenses held by (first name, middle
+    name, last name, origin state, active) people
+    """
+    df = pd.DataFrame(
+        people, columns=["first_name", "middle_name", "last_name", "origin", "active"]
+    )
+    return pd.DataFrame(
+        {
+            "first_name": df["first_name"],
+            "middle_name": df["middle_name"],
+            "last_name": df["last_name"],
+            "suffix": "",
+            "source_state": state,
+            "license_date": pd.Timestamp("2010-01-01")
+            + pd.to_timedelta(df.index * 400, unit="D"),
+            "origin_state": df["origin"],
+            "license_active": df["active"],
+            "expiration_date": pd.Timestamp("2026-01-01"),
+        }
+    )
+
+
+def assert_same_master(dfs_dict):
+    pd.testing.assert_frame_equal(
+        link_master_license_list(dfs_dict).reset_index(drop=True),
+        create_master_license_list(dfs_dict).reset_index(drop=True),
+    )
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_generated_rosters(seed):
+    rosters = generate_state_rosters(100, overlap=0.4, seed=seed)
+    assert_same_master(
+        {state: standardize_dataset(roster, state) for state, roster in rosters.items()}
+    )
+
+
+def test_middle_names_origins_and_activity():
+    assert_same_master(
+        {
+            "CA": standardized(
+                "CA",
+                [
+                    ("JOHN", "ALLEN", "SMITH", "UT", True),
+                    ("MARY", "ANN", "JONES", "CA", False),
+                    ("PAUL", "", "BROWN", "UT", True),
+                    ("RUTH", "B", "DAVIS", "", False),
+                    ("JANE", "", "MILLER", "", True),
+                ],
+            ),
+            "UT": standardized(
+                "UT",
+                [
+                    ("JOHN", "A", "SMITH", "UT", False),
+                    ("MARY", "BETH", "JONES", "CA", True),
+                    ("PAUL", "", "BROWN", "IL", True),
+                    ("RUTH", "", "DAVIS", "IL", True),
+                ],
+            ),
+            "IL": standardized(
+                "IL",
+                [
+                    ("JOHN", "", "SMITH", "UT", True),
+                    ("MARY", "ANN", "JONES", "", True),
+                    ("PAUL", "", "BROWN", "", False),
+                ],
+            ),
+        }
+    )
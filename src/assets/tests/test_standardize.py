@@ -0,0 +1,131 @@
+import pandas as pd
+import pytest
+
+import process_all_licenses
+
+from benchmark_licenses import generate_state_rosters, write_state_rosters
+from process_all_licenses import (
+    cached_standardize_dataset,
+    combine_license_records,
+    date_formats,
+    parse_date,
+    parse_date_column,
+    standardized_dtypes,
+    standardize_dataset,
+    validate_dataset,
+)
+from polars_licenses import load_standardized_datasets_lazy
+
+
+def ca_roster(dates, locations):
+    """
+    A CA export whose first records have these issue dates and locations
+    """
+    roster = generate_state_rosters(10, states=["CA"], seed=3)["CA"].astype(object)
+    roster.iloc[: len(dates), roster.columns.get_loc("Original Issue Date")] = dates
+    roster.iloc[: len(locations), roster.columns.get_loc("State")] = locations
+    return roster
+
+
+def test_out_of_range_dates_are_unparseable():
+    roster = ca_roster(["1/1/1066", "3/1/3020", "1/2/2003"], [])
+    standardized = standardize_dataset(roster, "CA")
+    assert standardized["license_date"].dtype == "datetime64[ns]"
+    assert standardized["license_date"][:3].tolist() == [
+        pd.NaT,
+        pd.NaT,
+        pd.Timestamp("2003-01-02"),
+    ]
+    errors = validate_dataset(roster, standardized, "CA")
+    assert errors.loc[errors["reason"] == "unparseable_date", "row"].tolist() == [0, 1]
+
+
+def test_numeric_locations_combine():
+    standardized = standardize_dataset(ca_roster([], [12345, "UT"]), "CA")
+    records = combine_license_records({"CA": standardized})
+    assert records["origin_state"][:2].tolist() == ["12345", "UT"]
+
+
+def test_polars_out_of_range_dates(tmp_path):
+    roster = ca_roster(["1/1/1066", "3/1/3020"], [])
+    exports = write_state_rosters({"CA": roster}, tmp_path)
+    errors = []
+    standardized = load_standardized_datasets_lazy(exports, errors=errors)["CA"]
+    pd.testing.assert_frame_equal(standardized, standardize_dataset(roster, "CA"))
+    pd.testing.assert_frame_equal(
+        errors[0], validate_dataset(roster, standardized, "CA")
+    )
+
+
+def test_polars_rejects_rolled_over_times(tmp_path):
+    roster = generate_state_rosters(10, states=["OK"], seed=3)["OK"]
+    roster.loc[roster.index[:3], "OriginalLicenseDate"] = [
+        "2003-01-02T23:59:60",
+        "2003-01-02T24:00:00",
+        "2003-01-02T23:59:59",
+    ]
+    exports = write_state_rosters({"OK": roster}, tmp_path)
+    standardized = load_standardized_datasets_lazy(exports)["OK"]
+    assert standardized["license_date"][:3].tolist() == [
+        pd.NaT,
+        pd.NaT,
+        pd.Timestamp("2003-01-02 23:59:59"),
+    ]
+    pd.testing.assert_frame_equal(standardized, standardize_dataset(roster, "OK"))
+
+
+def test_trailing_newline_is_not_a_date():
+    dates = pd.Series(["1/2/2003\n", "1/2/2003"])
+    assert parse_date(dates[0], "M/D/YYYY") is None
+    assert parse_date_column(dates, "M/D/YYYY").tolist() == [
+        pd.NaT,
+        pd.Timestamp("2003-01-02"),
+    ]
+
+
+odd_dates = [
+    "1/2/2003",
+    "1/ 2/2003",
+    "01/02/03",
+    "١/٢/٢٠٠٣",
+    "2/30/2003",
+    "2003-1-2",
+    "2003-01- 2",
+    "2003-01-02t1:2:3",
+    "2003-01-02T23:59:60",
+    "junk",
+    "",
+    None,
+    5,
+]
+
+
+@pytest.mark.parametrize("date_format", list(date_formats))
+def test_date_column_matches_scalar_parser(date_format):
+    dates = pd.Series(odd_dates, dtype=object)
+    parsed = parse_date_column(dates, date_format)
+    expected = dates.apply(parse_date, args=(date_format,))
+    assert parsed.isna().tolist() == expected.isna().tolist()
+    assert (parsed.dropna() == pd.to_datetime(expected.dropna())).all()
+
+
+def test_junk_dates_skip_the_scalar_parser(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        process_all_licenses, "parse_date", lambda *args: calls.append(args)
+    )
+    junk = pd.Series(["N/A", "unknown", "2003", "1/2/x", None, 5] * 1000)
+    for date_format in date_formats:
+        assert parse_date_column(junk, date_format).isna().all()
+    assert calls == []
+
+
+def test_cached_datasets_keep_compact_dtypes(tmp_path):
+    roster = generate_state_rosters(50, states=["CA"], seed=3)["CA"]
+    exports = write_state_rosters({"CA": roster}, tmp_path / "exports")
+    cache_dir = str(tmp_path / "cache")
+    standardized = cached_standardize_dataset(exports["CA"], "CA", cache_dir)
+    cached = cached_standardize_dataset(exports["CA"], "CA", cache_dir)
+    for column, dtype in standardized_dtypes.items():
+        assert cached[column].dtype == dtype
+    pd.testing.assert_frame_equal(cached, standardized)
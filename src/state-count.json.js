@@ -1,10 +1,8 @@
-const apiUrl = "http://localhost:8000/state-by-origin";
+import { readFile } from "node:fs/promises";
 
-const licenses = await fetch(apiUrl).then((response) => {
-  if (!response.ok) {
-    throw new Error(response.status);
-  }
-  return response.json();
-});
+// Written by assets/process_all_licenses.py alongside the master lists
+const aggregatePath = new URL("./assets/aggregates/state-count.json", import.meta.url);
+
+const licenses = JSON.parse(await readFile(aggregatePath, "utf-8"));
 
 process.stdout.write(JSON.stringify(licenses));